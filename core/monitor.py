@@ -18,11 +18,17 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import re
 import os
+import asyncio
+import glob
+import select
+import signal
 import time
 import logging
+import shutil
 import subprocess
+from collections import OrderedDict
 from contextlib import contextmanager
-from typing import Optional, Tuple, Union
+from typing import Dict, Optional, Tuple, Union
 from utils.strings import sanitize_string
 logger = logging.getLogger(__name__)
 
@@ -31,12 +37,186 @@ try:
     from Xlib.display import Display
     from Xlib.error import XError
     from Xlib.xobject.drawable import Window
+    from Xlib.protocol import request as xrequest
     XLIB_AVAILABLE = True
 except ImportError:
     XLIB_AVAILABLE = False
     logger.warning("python-xlib not available. Install with: pip install python-xlib")
 
 
+# Patterns used to simplify window titles in X11Monitor._extract_app_name
+_FILE_EXTENSION_RE = re.compile(r'\.[a-z]{2,4}$')
+_TRAILING_WORD_RE = re.compile(r'\s+(file|document|window|tab)$')
+
+# Number of 32-bit units requested per property in a pipelined batch
+_PROPERTY_LENGTH = 256
+
+# Maximum number of Xlib window wrappers kept for reuse
+_WINDOW_OBJ_CACHE_SIZE = 16
+
+# Maximum number of windows whose WM_CLASS is remembered
+_WM_CLASS_CACHE_SIZE = 256
+
+# Maximum number of application names whose PID is remembered
+_PID_CACHE_SIZE = 128
+
+# Maximum number of application names whose PID search terms are remembered
+_SEARCH_TERMS_CACHE_SIZE = 256
+
+# Number of PID cache inserts between sweeps for expired entries
+_PID_CACHE_SWEEP_INTERVAL = 32
+
+# How many levels of parent windows are searched for a missing WM_CLASS
+_WM_CLASS_MAX_DEPTH = 8
+
+# Whether process liveness can be checked through /proc
+_HAVE_PROCFS = os.path.isdir('/proc/self')
+
+# Seconds to wait for pgrep before giving up
+_PGREP_TIMEOUT = 1.0
+
+# Absolute path of pgrep, looked up once instead of searching PATH on every call
+_PGREP_PATH = shutil.which('pgrep')
+
+# Kinds of change reported by X11Monitor._handle_event, in increasing order
+_CHANGE_NONE = 0
+_CHANGE_TITLE = 1
+_CHANGE_FOCUS = 2
+
+# Characters with special meaning in POSIX extended regular expressions (pgrep)
+_ERE_SPECIAL = set('.[]{}()\\*+?^$|')
+
+
+def _ere_escape(text: str) -> str:
+    """Escape text for literal use in a POSIX extended regular expression."""
+    return ''.join('\\' + c if c in _ERE_SPECIAL else c for c in text)
+
+
+def _pid_alive(pid: int) -> bool:
+    """
+    Check if a process exists.
+    
+    On Linux this is a single stat() of /proc/<pid> instead of kill(pid, 0),
+    which avoids raising and catching an exception for every dead process.
+    Other platforms fall back to kill(pid, 0). Whether the process may be
+    signalled is left to _can_kill_process in the process manager.
+    """
+    if _HAVE_PROCFS:
+        return os.path.exists(f'/proc/{pid}')
+    
+    try:
+        # Signal 0 doesn't actually send a signal, just checks if process exists
+        os.kill(pid, 0)
+        return True
+    except PermissionError:
+        # Exists, but belongs to someone else
+        return True
+    except OSError:
+        return False
+
+
+def _pid_accessible(pid: int) -> bool:
+    """
+    Check if a process exists and we are allowed to signal it.
+    
+    Used to pick among the processes found by name, so that another user's
+    process with the same name isn't handed to the process manager, which
+    couldn't terminate it. Cached PIDs are revalidated with _pid_alive.
+    """
+    try:
+        # Signal 0 doesn't actually send a signal, just checks permission and existence
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _run_pgrep(pattern: str) -> Tuple[int, str]:
+    """
+    Run `pgrep -f pattern` and return its exit status and standard output.
+    
+    Uses os.posix_spawn with a bare pipe instead of subprocess.run, which
+    avoids a full fork of the daemon and the pipe bookkeeping of Popen on
+    every lookup. Falls back to subprocess.run where posix_spawn is missing.
+    
+    Raises:
+        FileNotFoundError: pgrep is not installed
+        subprocess.TimeoutExpired: pgrep did not finish within _PGREP_TIMEOUT
+    """
+    pgrep = _PGREP_PATH
+    if pgrep is None:
+        raise FileNotFoundError('pgrep')
+    args = [pgrep, '-f', pattern]
+    
+    if not hasattr(os, 'posix_spawn'):
+        result = subprocess.run(args, capture_output=True, timeout=_PGREP_TIMEOUT, text=True)
+        return result.returncode, result.stdout
+    
+    read_fd, write_fd = os.pipe()
+    try:
+        pid = os.posix_spawn(pgrep, args, os.environ, file_actions=[
+            (os.POSIX_SPAWN_DUP2, write_fd, 1),
+            (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+        ])
+    except BaseException:
+        os.close(read_fd)
+        raise
+    finally:
+        os.close(write_fd)
+    
+    chunks = []
+    deadline = time.monotonic() + _PGREP_TIMEOUT
+    try:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not select.select([read_fd], [], [], remaining)[0]:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                raise subprocess.TimeoutExpired(args, _PGREP_TIMEOUT)
+            chunk = os.read(read_fd, 4096)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    finally:
+        os.close(read_fd)
+    
+    _, status = os.waitpid(pid, 0)
+    returncode = os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+    return returncode, b''.join(chunks).decode('utf-8', 'replace')
+
+
+def _decode_window_name(win_name: Union[bytes, str]) -> str:
+    """Decode a _NET_WM_NAME/WM_NAME property value."""
+    if isinstance(win_name, bytes):
+        # Handle different encodings
+        try:
+            # Try UTF-8 first
+            win_name = win_name.decode('utf-8', 'replace')
+        except (UnicodeDecodeError, AttributeError):
+            # Fallback to latin1 (like xprop does)
+            win_name = win_name.decode('latin1', 'replace')
+    return win_name
+
+
+def _parse_window_class(class_str: Union[bytes, str]) -> str:
+    """Extract the lowercased class name from a WM_CLASS property value."""
+    # WM_CLASS is typically "instance_name\0class_name"
+    if isinstance(class_str, bytes):
+        # Work on the raw bytes and only decode the part we keep
+        parts = class_str.split(b'\x00', 2)
+        raw_class = parts[1] if len(parts) > 1 else parts[0]
+        try:
+            # Class names are nearly always plain ASCII
+            return raw_class.lower().decode('ascii')
+        except UnicodeDecodeError:
+            return raw_class.decode('utf-8', 'replace').lower()
+    # Split by null byte and take the class name (second part)
+    parts = class_str.split('\x00', 2)
+    if len(parts) > 1:
+        return parts[1].lower()  # Class name
+    return parts[0].lower()  # Fallback to instance name
+
+
 class X11Monitor:
     """Monitors active window in X11 environment using Xlib."""
     
@@ -44,8 +224,20 @@ class X11Monitor:
         self._last_window = None
         self._last_title = None
         self._last_win_id = None
-        self._pid_cache: dict[str, tuple[int, float]] = {}  # app_name -> (pid, timestamp)
+        self._last_class = None  # Sanitized WM_CLASS of the last window ("" if unset)
+        self._last_pid = None
+        self._pid_cache: OrderedDict[str, Tuple[int, float]] = OrderedDict()  # app_name -> (pid, timestamp)
         self._pid_cache_ttl = 30  # Cache PIDs for 30 seconds
+        self._pid_cache_inserts = 0  # Inserts since the last sweep of expired entries
+        # app_name -> (pgrep_pattern, scan_terms)
+        self._search_terms_cache: OrderedDict[str, Tuple[str, Tuple[str, ...]]] = OrderedDict()
+        # WM_CLASS and PID don't change during a window's lifetime, only the title does
+        self._win_meta_cache: Dict[int, Tuple[str, Optional[int], float]] = {}  # win_id -> (app_class, pid, timestamp)
+        self._win_meta_cache_ttl = 60  # Cache window metadata for 60 seconds
+        self._watched_win_id = None  # Window we receive PropertyNotify events for
+        # WM_CLASS never changes for a window, entries are only dropped on DestroyNotify or LRU eviction
+        self._wm_class_cache: OrderedDict[int, str] = OrderedDict()  # win_id -> class name
+        self._wobj_cache: OrderedDict[int, Window] = OrderedDict()  # win_id -> Xlib window wrapper
         
         if not XLIB_AVAILABLE:
             raise ImportError("python-xlib is required. Install with: pip install python-xlib")
@@ -62,6 +254,11 @@ class X11Monitor:
             self.WM_CLASS = self.disp.intern_atom('WM_CLASS')
             self.NET_WM_PID = self.disp.intern_atom('_NET_WM_PID')    # Process ID
             
+            # Get notified when the active window changes, and when the title
+            # of the active window changes (see wait_for_window_change)
+            self.root.change_attributes(event_mask=X.PropertyChangeMask)
+            self._watch_window(self._get_active_window_id())
+            
             logger.debug("X11Monitor initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize X11 connection: {e}")
@@ -72,12 +269,28 @@ class X11Monitor:
         """Simplify dealing with BadWindow (make it either valid or None)"""
         window_obj = None
         if win_id:
-            try:
-                window_obj = self.disp.create_resource_object('window', win_id)
-            except XError:
-                pass
+            window_obj = self._wobj_cache.get(win_id)
+            if window_obj is not None:
+                self._wobj_cache.move_to_end(win_id)
+            else:
+                try:
+                    window_obj = self.disp.create_resource_object('window', win_id)
+                except XError:
+                    pass
+                else:
+                    self._wobj_cache[win_id] = window_obj
+                    if len(self._wobj_cache) > _WINDOW_OBJ_CACHE_SIZE:
+                        self._wobj_cache.popitem(last=False)
         yield window_obj
     
+    def _forget_window(self, win_id: Optional[int]):
+        """
+        Drop the cached Xlib wrapper of a window after a request on it failed.
+        
+        Most likely the window is gone, and a new wrapper is cheap if it isn't.
+        """
+        self._wobj_cache.pop(win_id, None)
+    
     def _get_active_window_id(self) -> Optional[int]:
         """Get the ID of the currently active window."""
         try:
@@ -92,6 +305,51 @@ class X11Monitor:
             logger.debug(f"Error getting active window ID: {e}")
             return None
     
+    def _get_window_properties(self, win_id: int, atoms: Tuple[int, ...]) -> list:
+        """
+        Fetch several properties of a window in a single round-trip.
+        
+        All GetProperty requests are queued before the first reply is read,
+        so the X server answers them as one batch instead of one by one.
+        
+        Args:
+            win_id: X11 window ID
+            atoms: Property atoms to fetch
+            
+        Returns:
+            List with the property value (or None if unset) for each atom
+            
+        Raises:
+            XError: If the window is gone or a request fails
+        """
+        pending = [
+            xrequest.GetProperty(
+                display=self.disp.display,
+                defer=True,
+                delete=False,
+                window=win_id,
+                property=atom,
+                type=X.AnyPropertyType,
+                long_offset=0,
+                long_length=_PROPERTY_LENGTH
+            )
+            for atom in atoms
+        ]
+        
+        values = []
+        for atom, req in zip(atoms, pending):
+            req.reply()
+            if not req.property_type:
+                values.append(None)
+            elif req.bytes_after:
+                # Value didn't fit into the first chunk, fetch the rest the slow way
+                with self._window_obj(win_id) as wobj:
+                    prop = wobj.get_full_property(atom, X.AnyPropertyType) if wobj else None
+                values.append(prop.value if prop else None)
+            else:
+                values.append(req.value[1])
+        return values
+    
     def _get_window_name(self, win_id: Optional[int]) -> Optional[str]:
         """Get the window name/title for a given X11 window ID."""
         if not win_id:
@@ -107,48 +365,77 @@ class X11Monitor:
                     window_name = wobj.get_full_property(atom, 0)
                 except (XError, UnicodeDecodeError) as e:
                     logger.debug(f"Error getting window name property: {e}")
+                    if isinstance(e, XError):
+                        self._forget_window(win_id)
                     continue
                 
                 if window_name and window_name.value:
-                    win_name = window_name.value
-                    if isinstance(win_name, bytes):
-                        # Handle different encodings
-                        try:
-                            # Try UTF-8 first
-                            win_name = win_name.decode('utf-8', 'replace')
-                        except (UnicodeDecodeError, AttributeError):
-                            # Fallback to latin1 (like xprop does)
-                            win_name = win_name.decode('latin1', 'replace')
-                    return win_name
+                    return _decode_window_name(window_name.value)
             
             return None
     
+    def _cache_window_class(self, win_id: int, app_class: str):
+        """Remember the WM_CLASS of a window, evicting the least recently used entry."""
+        self._wm_class_cache[win_id] = app_class
+        self._wm_class_cache.move_to_end(win_id)
+        if len(self._wm_class_cache) > _WM_CLASS_CACHE_SIZE:
+            self._wm_class_cache.popitem(last=False)
+    
+    def _fetch_window_title(self, win_id: int) -> Optional[str]:
+        """Get the window title, requesting both name properties in one round-trip."""
+        try:
+            net_wm_name, wm_name = self._get_window_properties(
+                win_id, (self.NET_WM_NAME, self.WM_NAME)
+            )
+        except XError as e:
+            logger.debug(f"Pipelined title fetch failed, falling back: {e}")
+            self._forget_window(win_id)
+            return self._get_window_name(win_id)
+        
+        # Try _NET_WM_NAME first (UTF-8), then WM_NAME (legacy)
+        raw_name = net_wm_name or wm_name
+        return _decode_window_name(raw_name) if raw_name else None
+    
     def _get_window_class(self, win_id: Optional[int]) -> Optional[str]:
-        """Get the WM_CLASS for a window (application name)."""
+        """
+        Get the WM_CLASS for a window (application name).
+        
+        Some clients only set WM_CLASS on their top-level window, so parent
+        windows are searched when the window itself has none.
+        """
         if not win_id:
             return None
         
-        with self._window_obj(win_id) as wobj:
-            if not wobj:
-                return None
-            
-            try:
-                window_class = wobj.get_full_property(self.WM_CLASS, 0)
-                if window_class and window_class.value:
-                    # WM_CLASS is typically "instance_name\0class_name"
-                    class_str = window_class.value
-                    if isinstance(class_str, bytes):
-                        class_str = class_str.decode('utf-8', 'replace')
-                    # Split by null byte and take the class name (second part)
-                    parts = class_str.split('\x00')
-                    if len(parts) > 1:
-                        return parts[1].lower()  # Class name
-                    elif len(parts) == 1:
-                        return parts[0].lower()  # Fallback to instance name
-            except (XError, AttributeError, UnicodeDecodeError) as e:
-                logger.debug(f"Error getting window class: {e}")
+        cached = self._wm_class_cache.get(win_id)
+        if cached is not None:
+            self._wm_class_cache.move_to_end(win_id)
+            return cached
+        
+        current_id = win_id
+        for _ in range(_WM_CLASS_MAX_DEPTH):
+            with self._window_obj(current_id) as wobj:
+                if not wobj:
+                    return None
+                
+                try:
+                    window_class = wobj.get_full_property(self.WM_CLASS, 0)
+                    if window_class and window_class.value:
+                        app_class = _parse_window_class(window_class.value)
+                        self._cache_window_class(win_id, app_class)
+                        return app_class
+                    
+                    parent = wobj.query_tree().parent
+                except (XError, AttributeError, UnicodeDecodeError) as e:
+                    logger.debug(f"Error getting window class: {e}")
+                    if isinstance(e, XError):
+                        self._forget_window(current_id)
+                    return None
             
-            return None
+            if not parent or not parent.id or parent.id == self.root.id:
+                break
+            current_id = parent.id
+        
+        return None
     
     def _get_window_pid(self, win_id: Optional[int]) -> Optional[int]:
         """Get the process ID (PID) for a window using _NET_WM_PID."""
@@ -165,26 +452,74 @@ class X11Monitor:
                     # _NET_WM_PID is a CARDINAL (32-bit unsigned integer)
                     pid = pid_prop.value[0]
                     # Validate PID: must be positive and reasonable (not a system PID)
-                    # System PIDs are typically 1-10, but we'll be conservative and allow > 1
-                    # Also check if the process actually exists
+                    # System PIDs are typically 1-10, but we'll be conservative and allow > 1.
+                    # A mapped window's owner is alive, so existence isn't checked here;
+                    # callers that need it check with _pid_alive()
                     if pid > 1:
-                        try:
-                            import os
-                            # Check if process exists (signal 0 doesn't actually send a signal)
-                            os.kill(pid, 0)
-                            return pid
-                        except (OSError, ProcessLookupError, PermissionError):
-                            # Process doesn't exist or we can't access it
-                            logger.debug(f"PID {pid} from window is invalid or inaccessible")
-                            return None
+                        return pid
                     else:
                         logger.debug(f"PID {pid} from window is likely a system process, ignoring")
                         return None
             except (XError, AttributeError, IndexError) as e:
                 logger.debug(f"Error getting window PID: {e}")
+                if isinstance(e, XError):
+                    self._forget_window(win_id)
             
             return None
     
+    def _cache_pid(self, app_name: str, pid: int, current_time: float):
+        """Remember the PID found for an application name (bounded LRU)."""
+        self._pid_cache[app_name] = (pid, current_time)
+        self._pid_cache.move_to_end(app_name)
+        if len(self._pid_cache) > _PID_CACHE_SIZE:
+            self._pid_cache.popitem(last=False)
+        
+        # Expired entries are only removed on lookup, sweep them once in a while
+        self._pid_cache_inserts += 1
+        if self._pid_cache_inserts >= _PID_CACHE_SWEEP_INTERVAL:
+            self._pid_cache_inserts = 0
+            expired = [
+                name for name, (_, cache_time) in self._pid_cache.items()
+                if (current_time - cache_time) >= self._pid_cache_ttl
+            ]
+            for name in expired:
+                del self._pid_cache[name]
+    
+    def _get_search_terms(self, app_name: str) -> Tuple[str, Tuple[str, ...]]:
+        """
+        Get the pgrep pattern and process-scan terms for an application name.
+        
+        Returns:
+            Tuple of (pgrep_pattern, scan_terms), memoized per application name
+        """
+        cached = self._search_terms_cache.get(app_name)
+        if cached is not None:
+            self._search_terms_cache.move_to_end(app_name)
+            return cached
+        
+        # Clean up app name for matching
+        # Remove common suffixes and sanitize
+        search_name = app_name.lower().replace('_', '').replace('-', '')
+        
+        # Extract potential executable names from reverse domain names
+        # e.g., "org.vinegarhq.sober" -> "sober"
+        search_terms = [app_name]
+        if '.' in app_name:
+            # Try the last component (usually the executable name)
+            last_component = app_name.split('.')[-1]
+            search_terms.append(last_component)
+            # Also try without dots
+            search_terms.append(app_name.replace('.', ''))
+        
+        pgrep_pattern = '|'.join(_ere_escape(term) for term in search_terms)
+        scan_terms = tuple(dict.fromkeys((search_name, app_name.lower())))
+        
+        result = (pgrep_pattern, scan_terms)
+        self._search_terms_cache[app_name] = result
+        if len(self._search_terms_cache) > _SEARCH_TERMS_CACHE_SIZE:
+            self._search_terms_cache.popitem(last=False)
+        return result
+    
     def _find_pid_by_name(self, app_name: str) -> Optional[int]:
         """
         Try to find the process ID by matching the application name.
@@ -205,91 +540,163 @@ class X11Monitor:
         if app_name in self._pid_cache:
             cached_pid, cache_time = self._pid_cache[app_name]
             if (current_time - cache_time) < self._pid_cache_ttl:
+                self._pid_cache.move_to_end(app_name)
                 # Verify cached PID is still valid
-                try:
-                    os.kill(cached_pid, 0)
+                if _pid_alive(cached_pid):
                     return cached_pid
-                except (OSError, ProcessLookupError, PermissionError):
-                    # Cached PID is no longer valid, remove from cache
-                    del self._pid_cache[app_name]
+                # Cached PID is no longer valid, remove from cache
+                del self._pid_cache[app_name]
         
-        # Clean up app name for matching
-        # Remove common suffixes and sanitize
-        search_name = app_name.lower().replace('_', '').replace('-', '')
+        pgrep_pattern, scan_terms = self._get_search_terms(app_name)
         
-        # Extract potential executable names from reverse domain names
-        # e.g., "org.vinegarhq.sober" -> "sober"
-        search_terms = [app_name]
-        if '.' in app_name:
-            # Try the last component (usually the executable name)
-            last_component = app_name.split('.')[-1]
-            search_terms.append(last_component)
-            # Also try without dots
-            search_terms.append(app_name.replace('.', ''))
+        # Try using pgrep first (faster and more reliable); all search terms
+        # are combined into a single alternation so only one process is spawned
+        pgrep_matched = False
+        try:
+            returncode, output = _run_pgrep(pgrep_pattern)
+            if returncode == 0 and output.strip():
+                pgrep_matched = True
+                pids = [int(pid) for pid in output.split() if pid.strip()]
+                # Return the first valid PID we can access
+                for pid in pids:
+                    if pid > 1 and _pid_accessible(pid):
+                        # Cache the result
+                        self._cache_pid(app_name, pid, current_time)
+                        return pid
+        except (subprocess.TimeoutExpired, FileNotFoundError, ValueError):
+            pass
         
-        # Try using pgrep first (faster and more reliable)
-        for search_term in search_terms:
-            try:
-                result = subprocess.run(
-                    ['pgrep', '-f', search_term],
-                    capture_output=True,
-                    timeout=1,
-                    text=True
-                )
-                if result.returncode == 0 and result.stdout.strip():
-                    pids = [int(pid) for pid in result.stdout.strip().split('\n') if pid.strip()]
-                    # Return the first valid PID we can access
-                    for pid in pids:
-                        if pid > 1:
-                            try:
-                                os.kill(pid, 0)
-                                # Cache the result
-                                self._pid_cache[app_name] = (pid, current_time)
-                                return pid
-                            except (OSError, ProcessLookupError, PermissionError):
-                                continue
-            except (subprocess.TimeoutExpired, FileNotFoundError, ValueError):
-                continue
+        # pgrep found matching processes but none were accessible, scanning
+        # /proc would not turn up anything better
+        if pgrep_matched:
+            return None
         
-        # Fallback: try searching /proc (slower but doesn't require pgrep)
+        # Fallback: search all processes (slower but doesn't require pgrep)
         # Only do this if pgrep failed and we haven't found a PID
         try:
-            for pid_str in os.listdir('/proc'):
-                try:
-                    pid = int(pid_str)
-                    if pid <= 1:
-                        continue
-                    
-                    # Check if we can access this process
-                    try:
-                        os.kill(pid, 0)
-                    except (OSError, ProcessLookupError, PermissionError):
-                        continue
-                    
-                    # Read process command line
-                    try:
-                        with open(f'/proc/{pid}/cmdline', 'r') as f:
-                            cmdline = f.read().replace('\x00', ' ').lower()
-                            # Check if app name matches
-                            if search_name in cmdline or app_name.lower() in cmdline:
-                                # Cache the result
-                                self._pid_cache[app_name] = (pid, current_time)
-                                return pid
-                    except (IOError, OSError):
-                        continue
-                except (ValueError, OSError):
-                    continue
-        except (OSError, PermissionError):
-            # Can't read /proc
-            pass
+            pid = self._search_processes_psutil(scan_terms)
+        except ImportError:
+            pid = self._search_proc_cmdlines(scan_terms)
+        
+        if pid:
+            # Cache the result
+            self._cache_pid(app_name, pid, current_time)
+        return pid
+    
+    def _search_processes_psutil(self, search_terms: Tuple[str, ...]) -> Optional[int]:
+        """
+        Find an accessible process whose name or command line contains one of the terms.
+        
+        psutil reads the requested attributes of each process in one batch.
+        
+        Raises:
+            ImportError: If psutil is not installed
+        """
+        import psutil
+        
+        for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
+            pid = proc.info['pid']
+            if pid <= 1:
+                continue
+            
+            name = (proc.info['name'] or '').lower()
+            cmdline = ' '.join(proc.info['cmdline'] or ()).lower()
+            if any(term in name or term in cmdline for term in search_terms):
+                # Check if we can access this process
+                if _pid_accessible(pid):
+                    return pid
+        
+        return None
+    
+    def _search_proc_cmdlines(self, search_terms: Tuple[str, ...]) -> Optional[int]:
+        """
+        Find an accessible process whose command line contains one of the terms.
+        
+        A single grep scans all /proc/<pid>/cmdline files instead of opening
+        each of them from Python.
+        """
+        cmdline_files = glob.glob('/proc/[0-9]*/cmdline')
+        if not cmdline_files:
+            return None
+        
+        pattern = '|'.join(_ere_escape(term) for term in search_terms)
+        try:
+            grep = subprocess.Popen(
+                ['grep', '-liE', '--', pattern] + cmdline_files,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True
+            )
+            output, _ = grep.communicate(timeout=2)
+        except subprocess.TimeoutExpired:
+            grep.kill()
+            grep.communicate()
+            return None
+        except (FileNotFoundError, OSError):
+            return None
+        
+        # Exit status 2 is expected when processes vanish during the scan
+        if grep.returncode not in (0, 2):
+            return None
+        
+        for line in output.splitlines():
+            try:
+                pid = int(line.split('/')[2])
+            except (IndexError, ValueError):
+                continue
+            # Skip system processes and the grep process itself
+            if pid <= 1 or pid == grep.pid:
+                continue
+            
+            # Check if we can access this process
+            if _pid_accessible(pid):
+                return pid
         
         return None
     
+    def _get_window_meta(self, win_id: int) -> Optional[Tuple[str, Optional[int], float]]:
+        """Return cached (app_class, pid, timestamp) for a window if still fresh."""
+        meta = self._win_meta_cache.get(win_id)
+        if meta is None:
+            return None
+        if (time.time() - meta[2]) >= self._win_meta_cache_ttl:
+            del self._win_meta_cache[win_id]
+            return None
+        return meta
+    
+    def _store_window_meta(self, win_id: int, app_class: str, pid: Optional[int] = None):
+        """Cache metadata for a window, dropping expired entries of other windows."""
+        current_time = time.time()
+        expired = [
+            wid for wid, (_, _, cache_time) in self._win_meta_cache.items()
+            if (current_time - cache_time) >= self._win_meta_cache_ttl
+        ]
+        for wid in expired:
+            del self._win_meta_cache[wid]
+        self._win_meta_cache[win_id] = (app_class, pid, current_time)
+    
     def get_window_pid(self, win_id: Optional[int], app_name: Optional[str] = None) -> Optional[int]:
         """
         Resolve the process ID for a window, falling back to name-based lookup if needed.
         """
+        if win_id and win_id == self._last_win_id and self._last_pid:
+            if _pid_alive(self._last_pid):
+                return self._last_pid
+            self._last_pid = None
+        
+        meta = self._get_window_meta(win_id) if win_id else None
+        if meta and meta[1]:
+            if _pid_alive(meta[1]):
+                return meta[1]
+            # Owning process is gone, forget everything about this window
+            del self._win_meta_cache[win_id]
+            meta = None
+        
         pid = self._get_window_pid(win_id)
+        if pid and meta:
+            self._win_meta_cache[win_id] = (meta[0], pid, meta[2])
+        if pid and win_id == self._last_win_id:
+            self._last_pid = pid
         
         if not pid and app_name:
             pid = self._find_pid_by_name(app_name)
@@ -311,20 +718,75 @@ class X11Monitor:
             if not win_id:
                 return None
             
+            # Still the same window: only the title may have changed
+            if win_id == self._last_win_id and self._last_class is not None:
+                window_title = sanitize_string(self._fetch_window_title(win_id))
+                if not window_title:
+                    return None
+                app_name = self._last_class or self._extract_app_name(window_title)
+                self._last_title = window_title
+                self._last_window = app_name
+                return (app_name, window_title, win_id)
+            
+            # The class and PID of a known window are cached, so steady-state
+            # polls only need the title. Everything that is needed is fetched
+            # in one pipelined batch.
+            meta = self._get_window_meta(win_id)
+            cached_class = None
+            atoms = (self.NET_WM_NAME, self.WM_NAME)
+            if not meta:
+                atoms += (self.NET_WM_PID,)
+                cached_class = self._wm_class_cache.get(win_id)
+                if cached_class is None:
+                    atoms += (self.WM_CLASS,)
+            try:
+                values = self._get_window_properties(win_id, atoms)
+            except XError as e:
+                logger.debug(f"Pipelined property fetch failed, falling back: {e}")
+                values = None
+            
+            if values is not None:
+                # Try _NET_WM_NAME first (UTF-8), then WM_NAME (legacy)
+                raw_name = values[0] or values[1]
+                raw_title = _decode_window_name(raw_name) if raw_name else None
+            else:
+                raw_title = self._get_window_name(win_id)
+            
+            # Try to get application class first (more reliable)
+            if meta:
+                app_name = meta[0]
+                pid = meta[1]
+            else:
+                pid = None
+                if values is not None and values[2] and values[2][0] > 1:
+                    pid = values[2][0]
+                
+                if cached_class is not None:
+                    raw_class = cached_class
+                elif values is not None and values[3]:
+                    raw_class = _parse_window_class(values[3])
+                    self._cache_window_class(win_id, raw_class)
+                else:
+                    # Not set on the window itself (or the batch failed),
+                    # let the helper look at the parent windows
+                    raw_class = self._get_window_class(win_id)
+                app_name = sanitize_string(raw_class)
+                self._store_window_meta(win_id, app_name, pid)
+            
             # Get window title
-            window_title = sanitize_string(self._get_window_name(win_id))
+            window_title = sanitize_string(raw_title)
             if not window_title:
                 return None
             
-            # Try to get application class first (more reliable)
-            app_name = sanitize_string(self._get_window_class(win_id))
+            # Cache the result
+            self._last_win_id = win_id
+            self._last_class = app_name
+            self._last_pid = pid
             
             # If we couldn't get class, extract from title
             if not app_name:
                 app_name = self._extract_app_name(window_title)
             
-            # Cache the result
-            self._last_win_id = win_id
             self._last_title = window_title
             self._last_window = app_name
             
@@ -359,9 +821,9 @@ class X11Monitor:
         
         # Try to get from window title by removing common patterns
         # Remove file extensions
-        app_name = re.sub(r'\.[a-z]{2,4}$', '', title_lower)
+        app_name = _FILE_EXTENSION_RE.sub('', title_lower)
         # Remove common words
-        app_name = re.sub(r'\s+(file|document|window|tab)$', '', app_name)
+        app_name = _TRAILING_WORD_RE.sub('', app_name)
         
         # If title is very long, take first few words
         words = app_name.split()
@@ -370,6 +832,154 @@ class X11Monitor:
         
         return app_name.strip() if app_name.strip() else title_lower[:20]
     
+    def _watch_window(self, win_id: Optional[int]):
+        """Move the PropertyChangeMask subscription to the given window."""
+        if win_id == self._watched_win_id:
+            return
+        
+        with self._window_obj(self._watched_win_id) as wobj:
+            if wobj:
+                try:
+                    wobj.change_attributes(event_mask=X.NoEventMask)
+                except XError as e:
+                    logger.debug(f"Error unsubscribing from window events: {e}")
+                    self._forget_window(self._watched_win_id)
+        
+        self._watched_win_id = None
+        with self._window_obj(win_id) as wobj:
+            if wobj:
+                try:
+                    wobj.change_attributes(event_mask=X.PropertyChangeMask | X.StructureNotifyMask)
+                    self._watched_win_id = win_id
+                except XError as e:
+                    logger.debug(f"Error subscribing to window events: {e}")
+                    self._forget_window(win_id)
+    
+    def _handle_event(self, event) -> int:
+        """
+        Process a queued X event.
+        
+        Returns:
+            _CHANGE_FOCUS if the active window changed, _CHANGE_TITLE if the
+            title of the active window changed, _CHANGE_NONE otherwise
+        """
+        if event.type == X.DestroyNotify:
+            # Window IDs can be reused, forget what we know about this one
+            if event.window.id == self._last_win_id:
+                self._last_win_id = None
+            self._wm_class_cache.pop(event.window.id, None)
+            self._win_meta_cache.pop(event.window.id, None)
+            self._wobj_cache.pop(event.window.id, None)
+            return _CHANGE_NONE
+        
+        if event.type != X.PropertyNotify:
+            return _CHANGE_NONE
+        
+        window_id = event.window.id
+        if window_id == self.root.id and event.atom == self.NET_ACTIVE_WINDOW:
+            # Follow focus so title changes of the new window are reported
+            self._last_win_id = None
+            self._watch_window(self._get_active_window_id())
+            return _CHANGE_FOCUS
+        
+        if window_id == self._watched_win_id and event.atom in (self.NET_WM_NAME, self.WM_NAME):
+            return _CHANGE_TITLE
+        return _CHANGE_NONE
+    
+    def _drain_events(self) -> int:
+        """
+        Process all events Xlib has queued or can read without blocking.
+        
+        Returns:
+            The most significant change reported by any of them
+        """
+        changed = _CHANGE_NONE
+        while self.disp.pending_events():
+            changed = max(changed, self._handle_event(self.disp.next_event()))
+        return changed
+    
+    def _wait_for_change(self, timeout: Optional[float], wanted: int) -> bool:
+        """
+        Block until an event reporting at least the wanted kind of change.
+        
+        Already queued events are drained before waiting on the X connection,
+        otherwise events that Xlib has read but not yet processed would go
+        unnoticed until the next unrelated wakeup.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        try:
+            while True:
+                if self._drain_events() >= wanted:
+                    return True
+                
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                
+                readable, _, _ = select.select([self.disp.fileno()], [], [], remaining)
+                if not readable:
+                    return False
+        except Exception as e:
+            # Connection trouble, behave like a plain sleep so callers don't spin
+            logger.debug(f"Error waiting for X events: {e}")
+            if deadline is not None:
+                time.sleep(max(0, deadline - time.monotonic()))
+            return False
+    
+    def wait_for_window_change(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the active window or its title changes.
+        
+        Args:
+            timeout: Maximum number of seconds to wait, None to wait forever
+            
+        Returns:
+            True if a change was detected, False if the timeout expired
+        """
+        return self._wait_for_change(timeout, _CHANGE_TITLE)
+    
+    def wait_for_event(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until a different window becomes active.
+        
+        Unlike wait_for_window_change(), title changes of the active window
+        are processed but don't end the wait.
+        
+        Args:
+            timeout: Maximum number of seconds to wait, None to wait forever
+            
+        Returns:
+            True if the active window changed, False if the timeout expired
+        """
+        return self._wait_for_change(timeout, _CHANGE_FOCUS)
+    
+    async def await_active_window(self) -> Optional[Tuple[str, str, Optional[int]]]:
+        """
+        Wait for the active window or its title to change, then return it.
+        
+        The X connection is registered with the running asyncio event loop,
+        so the coroutine only wakes up when the X server sends data.
+        
+        Returns:
+            Same as get_active_window()
+        """
+        loop = asyncio.get_running_loop()
+        fd = self.disp.fileno()
+        
+        # Always drain the queue before going back to the reader, events
+        # that were already read from the socket won't make it readable again
+        while not self._drain_events():
+            readable = loop.create_future()
+            loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+            try:
+                await readable
+            finally:
+                loop.remove_reader(fd)
+        
+        return self.get_active_window()
+    
     def close(self):
         """Close the X11 display connection."""
         if hasattr(self, 'disp'):
@@ -17,15 +17,115 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import json
+import os
+import re
+import sys
+import threading
+from collections import Counter, OrderedDict
 import time as time_module
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
 from datetime import datetime, date, timedelta
 from typing import Dict, Optional, Tuple
 import logging
-import threading
+
+from utils.common import WEEKDAYS, json_dumps, json_loads
 
 logger = logging.getLogger(__name__)
 
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+# Number of delta log entries after which a regular save also rewrites the
+# data file atomically and empties the delta log (about an hour at 1s ticks)
+_DELTA_LOG_COMPACT_ENTRIES = 3600
+
+# Keys of a data file in the current format, and keys only found in older files
+_CURRENT_SCHEMA_KEYS = frozenset(
+    ("date", "denylisted_usage", "allowlisted_usage", "total_denylisted", "sessions"))
+_LEGACY_SCHEMA_KEYS = frozenset(
+    ("blacklisted_usage", "whitelisted_usage", "total_denylisted_seconds"))
+
+# zstd compression level for data files of finished days
+_ZSTD_LEVEL = 3
+
+# Minimum amount of unrecorded time in seconds before _record_progress books it
+_MIN_PROGRESS_INTERVAL = 1.0
+
+# Number of past days kept in history
+_HISTORY_DAYS = 30
+
+# Number of history log entries after which a periodic history save rewrites
+# history.json instead (a day's worth at the default 2 minute interval)
+_HISTORY_LOG_COMPACT_ENTRIES = 720
+
+# Shape of history day keys. Only the shape matters, as days are ordered
+# and expired by comparing the keys as strings
+_ISO_DATE_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+# Clock including time in suspend (Linux, Python 3.7+), see _suspended_time
+_CLOCK_BOOTTIME = getattr(time_module, "CLOCK_BOOTTIME", None)
+
+# Growth of the suspended time between two check_suspend calls that counts as a suspend
+_SUSPEND_MIN_SECONDS = 1.0
+
+# sync_file_range(2) isn't exposed by the os module, bind it from libc on Linux
+_SYNC_FILE_RANGE_WRITE = 2
+_sync_file_range = None
+if sys.platform.startswith('linux'):
+    try:
+        import ctypes
+        _sync_file_range = ctypes.CDLL(None, use_errno=True).sync_file_range
+        _sync_file_range.argtypes = [ctypes.c_int, ctypes.c_int64, ctypes.c_int64, ctypes.c_uint]
+    except (ImportError, OSError, AttributeError):
+        _sync_file_range = None
+
+
+def _iso(timestamp: float) -> str:
+    """Format a timestamp as local ISO 8601 time with seconds, without creating a datetime."""
+    return time_module.strftime("%Y-%m-%dT%H:%M:%S", time_module.localtime(timestamp))
+
+
+def _suspended_time() -> Optional[float]:
+    """Seconds spent in suspend since boot, or None where the clocks don't tell (non-Linux)."""
+    if _CLOCK_BOOTTIME is None:
+        return None
+    # CLOCK_BOOTTIME counts suspend, CLOCK_MONOTONIC doesn't
+    return time_module.clock_gettime(_CLOCK_BOOTTIME) - time_module.monotonic()
+
+
+def _fsync_directory(directory: Path):
+    """Make renames in directory durable (POSIX only, a no-op elsewhere)."""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _start_writeback(fd: int):
+    """Start writing a file's dirty pages to disk without waiting for it (Linux only)."""
+    if _sync_file_range is not None:
+        _sync_file_range(fd, 0, 0, _SYNC_FILE_RANGE_WRITE)
+
 
 class TimeTracker:
     """Tracks application usage time."""
@@ -41,16 +141,60 @@ class TimeTracker:
         self.data_directory = Path(data_directory)
         self.data_directory.mkdir(parents=True, exist_ok=True)
         self.config = config_manager
+        # Held while today's data, the delta log or the data files are changed.
+        # modify_rest_time and set_temporary_denylisted_usage run on the IPC
+        # server thread, concurrently with update on the main thread
+        self._lock = threading.RLock()
         self.current_app = None
-        self.current_start_time = None
-        self.last_progress_time = None
+        self.current_start_time = None  # Wall clock, for the session record
+        self._current_start_mono = None  # time.monotonic() at session start, for its duration
+        self._current_start_iso = None  # current_start_time formatted for the session record
+        self.last_progress_time = None  # time.monotonic() up to which the session was booked
+        self._rest_cache = (None, False)  # (minute, is_rest_time) of the last rest time check
+        self._limit_cache = None  # (daily limit with holiday multiplier, multiplier) for today
+        self._usage_cache = (None, (0, 0))  # (monotonic time, result) of the last get_current_usage
+        self._usage_cache_ttl = 0.25  # Seconds a get_current_usage result is reused
+        self._last_increment_t = 0.0  # time.monotonic() of the last usage increment
+        self._last_history_save_t = 0.0  # _last_increment_t as of the last history save
+        self._refresh_today()
+        self._last_day_check = 0.0  # time.time() of the last full check in _check_new_day
+        # Switched to _normalize_current_schema once a data file without legacy keys was loaded
+        self._normalize_fast = self._normalize_today_data
         self.today_data = self._load_today_data()
+        self._reset_running_totals()
+        # Replaced as a whole by _update_history and never modified in place,
+        # so readers can use it without locking
+        self._history_file_path = self.data_directory / "history.json"
+        # Periodic history saves append today's entry here, see save_history
+        self._history_log_path = self.data_directory / "history.jsonl"
+        self._history_log_entries = 0
+        # Lock against other tracker instances writing history, see _acquire_history_lock
+        self._history_lock_fd = None
         self.history = self._load_history()
-        self.history_lock = threading.Lock()
         self.last_data_save = time_module.time()
-        self.data_save_interval = 30  # Save data file at most every 30 seconds
-        # Suspend detection: track last check time
-        self.last_suspend_check_time = time_module.time()
+        self.data_save_interval = 300  # Rewrite the full data file at most every 5 minutes
+        # Usage increments and sessions are appended to a per-day delta log in
+        # between full saves, see _append_delta
+        self._delta_file = None
+        self._delta_date = None
+        self._delta_entries = 0  # Entries appended since the delta log was last emptied
+        self._dirty = False  # today_data changed since the last save
+        self._pending_commits = None  # Atomic writes waiting for _batched_commits to finish
+        # Suspend detection: track last check time (monotonic) and time spent in suspend so far
+        self.last_suspend_check_time = time_module.monotonic()
+        self._last_suspended_time = _suspended_time()
+    
+    def _refresh_today(self):
+        """Cache today's date, weekday name, data file path and history cutoff, refreshed on day rollover."""
+        today = date.today()
+        self._today = today
+        self._today_str = today.isoformat()
+        self._today_file_path = self._get_data_file_path(today)
+        # Oldest day kept in history
+        self._history_cutoff_str = (today - timedelta(days=_HISTORY_DAYS)).isoformat()
+        self._weekday_cached = WEEKDAYS[today.weekday()]
+        # Local time at which the next day starts
+        self._next_day_start = datetime.combine(today + timedelta(days=1), datetime.min.time()).timestamp()
     
     def _get_data_file_path(self, target_date: Optional[date] = None) -> Path:
         """Get path to data file for given date."""
@@ -60,6 +204,20 @@ class TimeTracker:
         filename = f"usage_{target_date.strftime('%Y-%m-%d')}.json"
         return self.data_directory / filename
     
+    def _get_compressed_data_file_path(self, target_date: Optional[date] = None) -> Path:
+        """Get path to the zstd compressed data file of a finished day."""
+        return self._get_data_file_path(target_date).with_suffix('.json.zst')
+    
+    def _get_delta_file_path(self, target_date: Optional[date] = None) -> Path:
+        """Get path to the append-only delta log for given date."""
+        return self._get_data_file_path(target_date).with_suffix('.jsonl')
+    
+    def _get_sessions_file_path(self, target_date: Optional[date] = None) -> Path:
+        """Get path to the append-only session log for given date."""
+        if target_date is None:
+            target_date = date.today()
+        return self.data_directory / f"sessions_{target_date.isoformat()}.jsonl"
+    
     def _normalize_today_data(self, data: Dict) -> Dict:
         """
         Normalize today's data structure, ensuring all required keys exist.
@@ -96,17 +254,14 @@ class TimeTracker:
         else:
             normalized["total_denylisted"] = data.get("total_denylisted", 0)
         
-        # Migrate duration_seconds -> duration in sessions
-        if "sessions" in data:
-            normalized["sessions"] = []
-            for session in data["sessions"]:
-                normalized_session = session.copy()
-                # Migrate duration_seconds to duration if needed
-                if "duration_seconds" in normalized_session and "duration" not in normalized_session:
-                    normalized_session["duration"] = normalized_session.pop("duration_seconds")
-                normalized["sessions"].append(normalized_session)
-        else:
-            normalized["sessions"] = data.get("sessions", [])
+        # Migrate duration_seconds -> duration in sessions, in place as data
+        # is freshly loaded and not used afterwards
+        sessions = data.get("sessions", [])
+        if isinstance(sessions, list):
+            for session in sessions:
+                if isinstance(session, dict) and "duration_seconds" in session and "duration" not in session:
+                    session["duration"] = session.pop("duration_seconds")
+        normalized["sessions"] = sessions
         
         # Ensure all values are the correct type
         if not isinstance(normalized["denylisted_usage"], dict):
@@ -118,6 +273,10 @@ class TimeTracker:
         if not isinstance(normalized["sessions"], list):
             normalized["sessions"] = []
         
+        # Per-app counters, missing apps count as zero
+        normalized["denylisted_usage"] = Counter(normalized["denylisted_usage"])
+        normalized["allowlisted_usage"] = Counter(normalized["allowlisted_usage"])
+        
         # Preserve rest_time_modification if it exists
         if "rest_time_modification" in data:
             normalized["rest_time_modification"] = data["rest_time_modification"]
@@ -126,6 +285,50 @@ class TimeTracker:
         if "temporary_denylisted_usage" in data:
             normalized["temporary_denylisted_usage"] = data["temporary_denylisted_usage"]
         
+        # Preserve the number of delta log entries already contained in this snapshot
+        if isinstance(data.get("delta_seq"), int):
+            normalized["delta_seq"] = data["delta_seq"]
+        
+        return normalized
+    
+    def _is_current_schema(self, data: Dict) -> bool:
+        """Check whether data was written by this version and needs no migration."""
+        if not _CURRENT_SCHEMA_KEYS.issubset(data) or not _LEGACY_SCHEMA_KEYS.isdisjoint(data):
+            return False
+        sessions = data["sessions"]
+        if not isinstance(sessions, list):
+            return False
+        return not any("duration_seconds" in session for session in sessions)
+    
+    def _normalize_current_schema(self, data: Dict) -> Dict:
+        """
+        Normalize data already in the current format, skipping the migrations.
+        
+        Used by _load_today_data after the first data file turned out to be in the
+        current format, as every file written since then is in that format too.
+        Falls back to _normalize_today_data for anything else.
+        """
+        if not _CURRENT_SCHEMA_KEYS.issubset(data):
+            return self._normalize_today_data(data)
+        denylisted = data["denylisted_usage"]
+        allowlisted = data["allowlisted_usage"]
+        if (not isinstance(denylisted, dict) or not isinstance(allowlisted, dict)
+                or not isinstance(data["sessions"], list)
+                or not isinstance(data["total_denylisted"], (int, float))):
+            return self._normalize_today_data(data)
+        
+        normalized = {
+            "date": data["date"],
+            "denylisted_usage": Counter(denylisted),
+            "allowlisted_usage": Counter(allowlisted),
+            "total_denylisted": data["total_denylisted"],
+            "sessions": data["sessions"],
+        }
+        for key in ("rest_time_modification", "temporary_denylisted_usage"):
+            if key in data:
+                normalized[key] = data[key]
+        if isinstance(data.get("delta_seq"), int):
+            normalized["delta_seq"] = data["delta_seq"]
         return normalized
     
     def _load_today_data(self, target_date: Optional[date] = None) -> Dict:
@@ -134,115 +337,428 @@ class TimeTracker:
             target_date = date.today()
         target_date_str = target_date.isoformat()
         data_file = self._get_data_file_path(target_date)
+        data = None
+        
+        try:
+            raw = self._read_data_file(target_date)
+            if raw is not None:
+                raw_data = json_loads(raw)
+                normalize = self._normalize_fast
+                if normalize == self._normalize_today_data and self._is_current_schema(raw_data):
+                    normalize = self._normalize_fast = self._normalize_current_schema
+                normalized = normalize(raw_data)
+                stored_date = normalized.get("date")
+                if stored_date != target_date_str:
+                    logger.warning(
+                        "Data file %s reports date %s instead of %s. "
+                        "Creating fresh usage data for the target day.",
+                        data_file,
+                        stored_date,
+                        target_date_str,
+                    )
+                else:
+                    normalized["date"] = target_date_str
+                    data = normalized
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Error loading data file {data_file}: {e}")
+        
+        if data is None:
+            data = {
+                "date": target_date_str,
+                "denylisted_usage": Counter(),
+                "allowlisted_usage": Counter(),
+                "total_denylisted": 0,
+                "sessions": [],
+            }
         
+        self._replay_deltas(data, target_date)
+        return data
+    
+    def _read_data_file(self, target_date: date) -> Optional[bytes]:
+        """
+        Read the raw data file for target_date.
+        
+        Falls back to the zstd compressed file of a finished day (see
+        _compress_data_file) if there is no plain one.
+        
+        Returns:
+            File content, or None if there is no data file for target_date
+        """
+        data_file = self._get_data_file_path(target_date)
         if data_file.exists():
+            with open(data_file, 'rb') as f:
+                return f.read()
+        
+        compressed_file = self._get_compressed_data_file_path(target_date)
+        if ZSTD_AVAILABLE and compressed_file.exists():
             try:
-                with open(data_file, 'r') as f:
-                    raw_data = json.load(f)
-                    normalized = self._normalize_today_data(raw_data)
-                    stored_date = normalized.get("date")
-                    if stored_date != target_date_str:
-                        logger.warning(
-                            "Data file %s reports date %s instead of %s. "
-                            "Creating fresh usage data for the target day.",
-                            data_file,
-                            stored_date,
-                            target_date_str,
-                        )
-                        return {
-                            "date": target_date_str,
-                            "denylisted_usage": {},
-                            "allowlisted_usage": {},
-                            "total_denylisted": 0,
-                            "sessions": [],
-                        }
-                    normalized["date"] = target_date_str
-                    return normalized
-            except (json.JSONDecodeError, IOError) as e:
-                logger.warning(f"Error loading data file {data_file}: {e}")
+                with open(compressed_file, 'rb') as f:
+                    with zstandard.ZstdDecompressor().stream_reader(f) as reader:
+                        return reader.read()
+            except zstandard.ZstdError as e:
+                raise IOError(f"Error decompressing {compressed_file}: {e}") from e
+        return None
+    
+    def _compress_data_file(self, target_date: date):
+        """Replace the data file of a finished day with a zstd compressed copy."""
+        data_file = self._get_data_file_path(target_date)
+        if not ZSTD_AVAILABLE or not data_file.exists():
+            return
         
-        return {
-            "date": target_date_str,
-            "denylisted_usage": {},
-            "allowlisted_usage": {},
-            "total_denylisted": 0,
-            "sessions": [],
-        }
+        compressed_file = self._get_compressed_data_file_path(target_date)
+        temp_file = compressed_file.with_suffix('.tmp')
+        try:
+            with open(data_file, 'rb') as src, open(temp_file, 'wb') as dst:
+                zstandard.ZstdCompressor(level=_ZSTD_LEVEL).copy_stream(src, dst)
+                dst.flush()
+                os.fdatasync(dst.fileno())
+            os.replace(temp_file, compressed_file)
+            data_file.unlink()
+            logger.debug("Compressed %s to %s", data_file, compressed_file)
+        except (IOError, OSError, zstandard.ZstdError) as e:
+            logger.warning(f"Error compressing data file {data_file}: {e}")
+            try:
+                temp_file.unlink()
+            except OSError:
+                pass
+    
+    def _replay_deltas(self, data: Dict, target_date: date):
+        """
+        Apply delta log entries written after the last full save to loaded data.
+        
+        Args:
+            data: Normalized usage data for target_date, modified in place
+            target_date: Day the delta log belongs to
+        """
+        delta_file = self._get_delta_file_path(target_date)
+        if not delta_file.exists():
+            return
+        
+        applied_seq = data.get("delta_seq", 0)
+        replayed = 0
+        try:
+            with open(delta_file, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json_loads(line)
+                        seq = entry["seq"]
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # Most likely a line cut short by a crash, skip it
+                        continue
+                    if seq <= applied_seq:
+                        continue
+                    
+                    kind = entry.get("kind")
+                    if kind == "deny":
+                        data["denylisted_usage"][entry["app"]] += entry["d"]
+                        data["total_denylisted"] += entry["d"]
+                    elif kind == "allow":
+                        data["allowlisted_usage"][entry["app"]] += entry["d"]
+                    applied_seq = seq
+                    replayed += 1
+        except (IOError, KeyError, TypeError) as e:
+            logger.warning(f"Error replaying delta log {delta_file}: {e}")
+        
+        data["delta_seq"] = applied_seq
+        if replayed:
+            logger.debug("Replayed %d entries from %s", replayed, delta_file)
+    
+    def _append_delta(self, entry: Dict):
+        """
+        Append a change to today's data to the delta log.
+        
+        This is a single small write instead of rewriting the full data file,
+        which only happens every data_save_interval seconds (see _save_today_data).
+        """
+        with self._lock:
+            self._dirty = True
+            today_data = self.today_data
+            data_date_str = today_data.get("date")
+            try:
+                if self._delta_file is None or self._delta_date != data_date_str:
+                    self._close_delta_file()
+                    target_date = datetime.fromisoformat(data_date_str).date()
+                    self._delta_file = open(self._get_delta_file_path(target_date), 'ab', buffering=0)
+                    self._delta_date = data_date_str
+                
+                seq = today_data.get("delta_seq", 0) + 1
+                today_data["delta_seq"] = seq
+                self._delta_entries += 1
+                entry["seq"] = seq
+                self._delta_file.write(json_dumps(entry) + b"\n")
+            except (IOError, ValueError, TypeError) as e:
+                logger.error(f"Error appending to delta log: {e}")
+    
+    def _append_session(self, session: Dict):
+        """
+        Append a finished session to today's session log.
+        
+        Sessions are kept out of today_data so full saves don't rewrite
+        every session of the day.
+        """
+        try:
+            target_date = datetime.fromisoformat(self.today_data["date"]).date()
+            with open(self._get_sessions_file_path(target_date), 'ab') as f:
+                f.write(json_dumps(session) + b"\n")
+            self._session_count += 1
+        except (IOError, KeyError, ValueError, TypeError) as e:
+            logger.error(f"Error appending to session log: {e}")
+    
+    def _count_logged_sessions(self, target_date: Optional[date] = None) -> int:
+        """Count the sessions in the session log for target_date."""
+        try:
+            with open(self._get_sessions_file_path(target_date), 'rb') as f:
+                # A line cut short by a crash has no newline and isn't counted
+                return f.read().count(b"\n")
+        except FileNotFoundError:
+            return 0
+        except IOError as e:
+            logger.warning(f"Error reading session log: {e}")
+            return 0
+    
+    def _truncate_delta_log(self, target_date: date):
+        """Remove the delta log for target_date after its entries were saved in full."""
+        if self._delta_date == target_date.isoformat():
+            # Reopened by the next _append_delta
+            self._close_delta_file()
+        try:
+            self._get_delta_file_path(target_date).unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Error removing delta log: {e}")
+    
+    def _close_delta_file(self):
+        """Close the delta log file if it is open."""
+        if self._delta_file is not None:
+            try:
+                self._delta_file.close()
+            except IOError:
+                pass
+            self._delta_file = None
+            self._delta_date = None
     
     def _save_today_data(self, force: bool = False):
         """
         Save today's usage data.
         
+        Changes in between are kept in the delta log, which is emptied once
+        the full data file has been written.
+        
         Args:
             force: If True, save immediately. If False, only save if enough time has passed.
         """
-        current_time = time_module.time()
+        with self._lock:
+            current_time = time_module.time()
+            
+            # Throttle saves - only save if something changed and enough time has passed, or forced
+            if not force and (not self._dirty or (current_time - self.last_data_save) < self.data_save_interval):
+                return
+            
+            data_date_str = self.today_data.get("date")
+            target_date = None
+            if data_date_str == self._today_str:
+                # Usual case, the path of the current day's file is cached
+                target_date = self._today
+                data_file = self._today_file_path
+            else:
+                if data_date_str:
+                    try:
+                        target_date = datetime.fromisoformat(data_date_str).date()
+                    except ValueError:
+                        logger.warning("Invalid date format '%s' in today_data; resetting to today.", data_date_str)
+                        target_date = date.today()
+                        self.today_data["date"] = target_date.isoformat()
+                        self._dirty = True
+                else:
+                    target_date = date.today()
+                    self.today_data["date"] = target_date.isoformat()
+                    self._dirty = True
+                
+                data_file = self._get_data_file_path(target_date)
+            
+            # Nothing changed since the last atomic save emptied the delta log,
+            # so even a forced save would write the same file again
+            if (not self._dirty and data_file.exists()
+                    and not self._get_delta_file_path(target_date).exists()):
+                return
+            
+            try:
+                # Pretty-printed only for debugging, compact output is a fraction of the work
+                blob = json_dumps(self.today_data, indent=logger.isEnabledFor(logging.DEBUG))
+                if force or self._delta_entries >= _DELTA_LOG_COMPACT_ENTRIES:
+                    saved_seq = self.today_data.get("delta_seq")
+                    
+                    def on_commit():
+                        # Everything in the delta log is durably part of the data file now,
+                        # unless more changes were logged while the commit was deferred
+                        if self.today_data.get("delta_seq") == saved_seq:
+                            self._truncate_delta_log(target_date)
+                            self._delta_entries = 0
+                    
+                    self._write_atomic(data_file, blob, on_commit)
+                else:
+                    # Replaced without fsync, so a crash leaves either the old or
+                    # the new file, but the new one may not have reached the disk.
+                    # The delta log is kept until the next atomic save for that
+                    self._write_replace(data_file, blob)
+                logger.debug("Today's data file saved successfully")
+                self.last_data_save = current_time
+                self._dirty = False
+            except IOError as e:
+                logger.error(f"Error saving data file: {e}")
+            except Exception as e:
+                logger.error(f"Unexpected error saving data file: {e}", exc_info=True)
+            
+            # Update history (without lock - will be locked by save_history if needed)
+            # Don't update history here to avoid lock contention
+    
+    def _write_atomic(self, target: Path, blob: bytes, on_commit=None):
+        """
+        Replace target with blob through a temporary file and rename.
         
-        # Throttle saves - only save if enough time has passed or forced
-        if not force and (current_time - self.last_data_save) < self.data_save_interval:
-            return
+        Writeback of the temporary file starts right away. Inside a
+        _batched_commits block waiting for it to reach the disk and the rename
+        are deferred, so that several files are written back in parallel.
         
-        data_date_str = self.today_data.get("date")
-        target_date = None
-        if data_date_str:
+        Args:
+            target: File to replace
+            blob: New file content
+            on_commit: Optional callable to run once target has been replaced
+        """
+        # Save to temporary file first, then rename (atomic operation)
+        temp_file = target.with_suffix('.tmp')
+        logger.debug("Saving to temp file: %s", temp_file)
+        fd = os.open(temp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(blob)
+            while view:
+                view = view[os.write(fd, view):]
+            _start_writeback(fd)
+        except OSError:
+            os.close(fd)
+            # Clean up temp file if it exists
             try:
-                target_date = datetime.fromisoformat(data_date_str).date()
-            except ValueError:
-                logger.warning("Invalid date format '%s' in today_data; resetting to today.", data_date_str)
-                target_date = date.today()
-                self.today_data["date"] = target_date.isoformat()
+                temp_file.unlink()
+            except OSError:
+                pass
+            raise
+        
+        # The descriptor stays open until the commit, which syncs through it
+        if self._pending_commits is not None:
+            self._pending_commits.append((fd, temp_file, target, on_commit))
         else:
-            target_date = date.today()
-            self.today_data["date"] = target_date.isoformat()
+            self._commit_atomic(fd, temp_file, target, on_commit)
+    
+    def _write_replace(self, target: Path, blob: bytes):
+        """
+        Replace target with blob through a temporary file and rename, without syncing.
         
-        data_file = self._get_data_file_path(target_date)
+        Readers never see a partially written file, but unlike _write_atomic
+        the new content is not durable once this returns.
+        """
+        temp_file = target.with_suffix('.partial')
+        try:
+            with open(temp_file, 'wb') as f:
+                f.write(blob)
+            os.replace(temp_file, target)
+        except OSError:
+            try:
+                temp_file.unlink()
+            except OSError:
+                pass
+            raise
+    
+    def _commit_atomic(self, fd: int, temp_file: Path, target: Path, on_commit=None,
+                       sync_dir: bool = True):
+        """
+        Wait for temp_file to reach the disk through fd, close it and rename temp_file over target.
         
+        Args:
+            sync_dir: If False, the caller syncs the directory to make the rename durable
+        """
         try:
-            # Save to temporary file first, then rename (atomic operation)
-            temp_file = data_file.with_suffix('.tmp')
-            logger.debug(f"Saving to temp file: {temp_file}")
-            with open(temp_file, 'w') as f:
-                json.dump(self.today_data, f, indent=2)
-            logger.debug(f"Renaming temp file to: {data_file}")
-            # Atomic rename
-            temp_file.replace(data_file)
-            logger.debug("Today's data file saved successfully")
-            self.last_data_save = current_time
-        except IOError as e:
-            logger.error(f"Error saving data file: {e}")
-        except Exception as e:
-            logger.error(f"Unexpected error saving data file: {e}", exc_info=True)
-        
-        # Update history (without lock - will be locked by save_history if needed)
-        # Don't update history here to avoid lock contention
-    
-    def _ensure_today_data_keys(self):
-        """Ensure today_data has required keys."""
-        if "sessions" not in self.today_data:
-            self.today_data["sessions"] = []
-        if "denylisted_usage" not in self.today_data:
-            self.today_data["denylisted_usage"] = {}
-        if "allowlisted_usage" not in self.today_data:
-            self.today_data["allowlisted_usage"] = {}
-        if "total_denylisted" not in self.today_data:
-            self.today_data["total_denylisted"] = 0
-
+            os.fdatasync(fd)
+        finally:
+            os.close(fd)
+        logger.debug("Renaming temp file to: %s", target)
+        # Atomic rename
+        os.replace(temp_file, target)
+        if sync_dir:
+            _fsync_directory(target.parent)
+        if on_commit is not None:
+            on_commit()
+    
+    @contextmanager
+    def _batched_commits(self):
+        """Defer the commits of atomic writes made in this block until its end."""
+        self._pending_commits = []
+        try:
+            yield
+        finally:
+            pending, self._pending_commits = self._pending_commits, None
+            directories = set()
+            for fd, temp_file, target, on_commit in pending:
+                try:
+                    self._commit_atomic(fd, temp_file, target, on_commit, sync_dir=False)
+                    directories.add(target.parent)
+                except (IOError, OSError) as e:
+                    logger.error(f"Error saving {target}: {e}")
+            # One directory sync covers all renames in it
+            for directory in directories:
+                try:
+                    _fsync_directory(directory)
+                except OSError as e:
+                    logger.error(f"Error syncing {directory}: {e}")
+    
+    def _reset_running_totals(self):
+        """Recompute the running totals kept alongside today_data after loading it."""
+        # Sum of allowlisted_usage
+        self._allowlisted_total = sum(self.today_data["allowlisted_usage"].values())
+        # Denylisted and allowlisted usage per app combined, as stored in history
+        self._today_combined = Counter()
+        self._today_combined.update(self.today_data["denylisted_usage"])
+        self._today_combined.update(self.today_data["allowlisted_usage"])
+        # Sessions stored in today_data by older versions plus the session log
+        self._session_count = len(self.today_data["sessions"]) + self._count_logged_sessions()
+    
     def _increment_usage(self, app_name: str, duration: float):
         """Increment usage counters for the current app."""
         if duration <= 0 or not app_name:
             return
 
-        self._ensure_today_data_keys()
-
-        if self.config.is_denylisted(app_name):
-            self.today_data["denylisted_usage"].setdefault(app_name, 0)
-            self.today_data["denylisted_usage"][app_name] += duration
-            self.today_data["total_denylisted"] += duration
+        today_data = self.today_data
+        if self._classify(app_name) == "deny":
+            today_data["denylisted_usage"][app_name] += duration
+            today_data["total_denylisted"] += duration
+            kind = "deny"
         else:
             # Apps not in denylist (allowlisted or unknown) count as allowlisted_usage
-            self.today_data["allowlisted_usage"].setdefault(app_name, 0)
-            self.today_data["allowlisted_usage"][app_name] += duration
+            today_data["allowlisted_usage"][app_name] += duration
+            self._allowlisted_total += duration
+            kind = "allow"
+        
+        self._today_combined[app_name] += duration
+        self._last_increment_t = time_module.monotonic()
+        self._append_delta({"t": time_module.time(), "app": app_name, "d": duration, "kind": kind})
 
+    def _classify(self, app_name: str) -> str:
+        """Classify an application as "deny", "allow" or "unknown" according to the config."""
+        # ConfigManager.classify keeps a bounded cache of its own
+        return self.config.classify(app_name)
+    
+    def _is_rest_time(self) -> bool:
+        """Check for rest time, at most once per minute (rest times have minute resolution)."""
+        minute = int(time_module.time() // 60)
+        if self._rest_cache[0] != minute:
+            self._rest_cache = (minute, self.config.is_rest_time())
+        return self._rest_cache[1]
+    
+    def invalidate_config_cache(self):
+        """Forget cached config lookups, call after the configuration was reloaded."""
+        self._rest_cache = (None, False)
+        self._limit_cache = None
+    
     def check_suspend(self) -> bool:
         """
         Check if computer was suspended by comparing time delta.
@@ -251,27 +767,38 @@ class TimeTracker:
         Returns:
             True if suspend was detected, False otherwise
         """
-        now = time_module.time()
-        elapsed = now - self.last_suspend_check_time
-        
-        # If more than 1 minute has passed, computer was likely suspended
-        SUSPEND_THRESHOLD = 60  # 1 minute in seconds
-        
-        if elapsed > SUSPEND_THRESHOLD:
-            logger.info(
-                f"Suspend detected: {elapsed:.1f}s gap since last check. "
-                f"Time during suspend will not be counted as usage."
-            )
-            # Update last_progress_time to now to skip counting the suspended time
-            if self.last_progress_time is not None:
-                self.last_progress_time = now
+        with self._lock:
+            now = time_module.monotonic()
+            elapsed = now - self.last_suspend_check_time
+            
+            suspended = _suspended_time()
+            if suspended is not None:
+                # The kernel tells how long it was suspended, durations are taken
+                # from the monotonic clock which doesn't advance during suspend
+                slept = suspended - self._last_suspended_time
+                self._last_suspended_time = suspended
+                detected = slept > _SUSPEND_MIN_SECONDS
+            else:
+                # If more than 1 minute has passed, computer was likely suspended
+                SUSPEND_THRESHOLD = 60  # 1 minute in seconds
+                slept = elapsed
+                detected = elapsed > SUSPEND_THRESHOLD
+            
+            if detected:
+                logger.info(
+                    f"Suspend detected: {slept:.1f}s in suspend since last check. "
+                    f"Time during suspend will not be counted as usage."
+                )
+                # Update last_progress_time to now to skip counting the suspended time
+                if self.last_progress_time is not None:
+                    self.last_progress_time = now
+                # Update suspend check time
+                self.last_suspend_check_time = now
+                return True
+            
             # Update suspend check time
             self.last_suspend_check_time = now
-            return True
-        
-        # Update suspend check time
-        self.last_suspend_check_time = now
-        return False
+            return False
     
     def _record_progress(self, force: bool = False):
         """
@@ -281,12 +808,14 @@ class TimeTracker:
         if self.current_app is None or self.current_start_time is None:
             return
 
-        now = time_module.time()
+        now = time_module.monotonic()
         if self.last_progress_time is None:
-            self.last_progress_time = self.current_start_time
+            self.last_progress_time = self._current_start_mono
 
         elapsed = now - self.last_progress_time
-        if elapsed <= 0 and not force:
+        # Let short spans accumulate and book them in one increment. Until then
+        # they are part of the live session that readers add on top
+        if elapsed < _MIN_PROGRESS_INTERVAL and not force:
             return
 
         # Detect suspend: if elapsed time is greater than 1 minute, computer was likely suspended
@@ -319,6 +848,13 @@ class TimeTracker:
         Returns:
             True if the day was reset, False otherwise
         """
+        # Called every tick. Before midnight only look at the date every 30
+        # seconds, that still catches clock changes in either direction
+        now = time_module.time()
+        if now < self._next_day_start and 0 <= now - self._last_day_check < 30:
+            return False
+        self._last_day_check = now
+        
         current_date = self.today_data.get("date")
         today_str = date.today().isoformat()
         
@@ -334,22 +870,37 @@ class TimeTracker:
             except Exception as e:
                 logger.error(f"Error ending session during day rollover: {e}", exc_info=True)
         
-        # Ensure today's data is saved and history updated
-        try:
-            self._save_today_data(force=True)
-        except Exception as e:
-            logger.error(f"Error saving daily data during day rollover: {e}", exc_info=True)
+        # Ensure today's data is saved and history updated, both files are
+        # written back to disk together
+        with self._batched_commits():
+            try:
+                self._save_today_data(force=True)
+            except Exception as e:
+                logger.error(f"Error saving daily data during day rollover: {e}", exc_info=True)
+            
+            try:
+                self.save_history(force=True)
+            except Exception as e:
+                logger.error(f"Error saving history during day rollover: {e}", exc_info=True)
         
+        # The previous day is final now, its data file is only read rarely
         try:
-            self.save_history()
-        except Exception as e:
-            logger.error(f"Error saving history during day rollover: {e}", exc_info=True)
+            self._compress_data_file(datetime.fromisoformat(self.today_data["date"]).date())
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"Not compressing data file of previous day: {e}")
         
         # Load fresh data for the new day
+        self._close_delta_file()
+        self._refresh_today()
         self.today_data = self._load_today_data()
+        self._reset_running_totals()
         self.current_app = None
         self.current_start_time = None
+        self._current_start_mono = None
+        self._current_start_iso = None
         self.last_progress_time = None
+        self._usage_cache = (None, (0, 0))
+        self._limit_cache = None
         
         return True
     
@@ -369,8 +920,11 @@ class TimeTracker:
             self._end_current_session()
         
         self.current_app = app_name
+        self._usage_cache = (None, (0, 0))
         self.current_start_time = time_module.time()
-        self.last_progress_time = self.current_start_time
+        self._current_start_mono = time_module.monotonic()
+        self._current_start_iso = _iso(self.current_start_time)
+        self.last_progress_time = self._current_start_mono
     
     def _end_current_session(self):
         """End current tracking session and record it."""
@@ -380,25 +934,29 @@ class TimeTracker:
         # Capture any remaining progress before ending session
         self._record_progress(force=True)
 
-        duration = time_module.time() - self.current_start_time
+        duration = time_module.monotonic() - self._current_start_mono
         ended_app = self.current_app  # Store before clearing
         
-        # Ensure required keys exist (defensive programming)
-        self._ensure_today_data_keys()
+        start_iso = self._current_start_iso
+        if start_iso is None:
+            start_iso = _iso(self.current_start_time)
         
         # Record session
         session = {
             "app": ended_app,
-            "start": datetime.fromtimestamp(self.current_start_time).isoformat(),
-            "end": datetime.now().isoformat(),
+            "start": start_iso,
+            "end": _iso(time_module.time()),
             "duration": duration
         }
-        self.today_data["sessions"].append(session)
+        self._append_session(session)
         
         # Clear current session before saving (to avoid double-counting in history)
         self.current_app = None
         self.current_start_time = None
+        self._current_start_mono = None
+        self._current_start_iso = None
         self.last_progress_time = None
+        self._usage_cache = (None, (0, 0))
         
         self._save_today_data()
     
@@ -410,16 +968,17 @@ class TimeTracker:
             app_name: Application name
             window_title: Full window title
         """
-        # Check for day rollover before recording progress
-        day_reset = self._check_new_day()
-        
-        # Record progress for the currently active session
-        self._record_progress()
-        
-        # Continue tracking - rest time only affects whether usage counts towards limit,
-        # not whether we track it
-        if day_reset or self.current_app is None or app_name != self.current_app:
-            self.start_tracking(app_name, window_title)
+        with self._lock:
+            # Check for day rollover before recording progress
+            day_reset = self._check_new_day()
+            
+            # Record progress for the currently active session
+            self._record_progress()
+            
+            # Continue tracking - rest time only affects whether usage counts towards limit,
+            # not whether we track it
+            if day_reset or self.current_app is None or app_name != self.current_app:
+                self.start_tracking(app_name, window_title)
     
     def get_current_usage(self) -> Tuple[int, int]:
         """
@@ -428,31 +987,34 @@ class TimeTracker:
         Returns:
             Tuple of (denylisted, allowlisted) in seconds
         """
+        # Stats are requested several times per tick, the result can't
+        # meaningfully change within a fraction of a second
+        now = time_module.monotonic()
+        cached_at, cached_usage = self._usage_cache
+        if cached_at is not None and now - cached_at < self._usage_cache_ttl:
+            return cached_usage
+        
         # Always calculate actual usage (temporary usage acts as a limit, not usage override)
         denylisted = self.today_data.get("total_denylisted", 0)
+        allowlisted = self._allowlisted_total
         
         # Add current session if tracking (only the portion since last progress)
         if self.current_app and self.current_start_time:
-            reference_time = self.last_progress_time or self.current_start_time
-            current_duration = max(0, time_module.time() - reference_time)
-            if self.config.is_denylisted(self.current_app):
+            reference_time = self.last_progress_time or self._current_start_mono
+            current_duration = max(0, time_module.monotonic() - reference_time)
+            kind = self._classify(self.current_app)
+            if kind == "deny":
                 # Denylisted: always count (even during rest time)
                 denylisted += current_duration
-            elif not self.config.is_allowlisted(self.current_app):
-                # Unknown apps: only count if not in rest time
-                if not self.config.is_rest_time():
-                    denylisted += current_duration
-        
-        allowlisted = sum(self.today_data.get("allowlisted_usage", {}).values())
-        
-        # Add current session if tracking allowlisted
-        if self.current_app and self.current_start_time:
-            if self.config.is_allowlisted(self.current_app):
-                reference_time = self.last_progress_time or self.current_start_time
-                current_duration = max(0, time_module.time() - reference_time)
+            elif kind == "allow":
                 allowlisted += current_duration
+            elif not self._is_rest_time():
+                # Unknown apps: only count if not in rest time
+                denylisted += current_duration
         
-        return (int(denylisted), int(allowlisted))
+        usage = (int(denylisted), int(allowlisted))
+        self._usage_cache = (now, usage)
+        return usage
     
     def get_remaining_time(self) -> int:
         """Get remaining time in seconds for denylisted apps."""
@@ -462,6 +1024,21 @@ class TimeTracker:
         
         return remaining
     
+    def _get_base_daily_limit(self) -> Tuple[int, float]:
+        """
+        Get today's daily limit with the holiday multiplier applied.
+        
+        Cached until the next day or config reload, as both only change then.
+        
+        Returns:
+            Tuple of (limit in seconds, holiday multiplier)
+        """
+        if self._limit_cache is None:
+            multiplier = self.config.get_holiday_limit_multiplier()
+            limit = int(self.config.get_daily_limit(self._weekday_cached) * multiplier)
+            self._limit_cache = (limit, multiplier)
+        return self._limit_cache
+    
     def get_adjusted_daily_limit(self) -> int:
         """
         Get the daily limit adjusted for rest time modifications, holiday multiplier,
@@ -470,12 +1047,7 @@ class TimeTracker:
         Returns:
             Adjusted daily limit in seconds
         """
-        weekday = datetime.now().strftime("%A").lower()
-        limit = self.config.get_daily_limit(weekday)
-        
-        # Apply holiday multiplier
-        multiplier = self.config.get_holiday_limit_multiplier()
-        limit = int(limit * multiplier)
+        limit = self._get_base_daily_limit()[0]
         
         # Apply rest time modification if it exists
         if "rest_time_modification" in self.today_data:
@@ -505,93 +1077,94 @@ class TimeTracker:
         Returns:
             Dict with status, message, and details about the modification
         """
-        # Check if rest time has already been modified today
-        if "rest_time_modification" in self.today_data:
-            return {
-                "status": "error",
-                "message": "Rest time has already been modified for today. Only one modification per day is allowed."
+        with self._lock:
+            # Check if rest time has already been modified today
+            if "rest_time_modification" in self.today_data:
+                return {
+                    "status": "error",
+                    "message": "Rest time has already been modified for today. Only one modification per day is allowed."
+                }
+            
+            # Get current rest times
+            now = datetime.now()
+            weekday = self._weekday_cached
+            current_rest_times = self.config.get_rest_times(weekday)
+            
+            # Check if in holiday season
+            holiday_rest = self.config._get_holiday_rest_times(now)
+            if holiday_rest:
+                current_rest_times = holiday_rest
+            
+            # Calculate original rest time duration
+            original_duration = self.config.calculate_rest_time_duration(current_rest_times, now)
+            
+            # Determine new values
+            new_evening_start = evening_start if evening_start is not None else current_rest_times["evening"]["start"]
+            new_morning_end = morning_end if morning_end is not None else current_rest_times["morning"]["end"]
+            
+            # Evening rest time continues uninterrupted until morning_end
+            # Morning rest time starts at midnight (00:00) and ends at morning_end
+            new_rest_times = {
+                "morning": {
+                    "start": "00:00",  # Morning always starts at midnight
+                    "end": new_morning_end
+                },
+                "evening": {
+                    "start": new_evening_start,
+                    "end": new_morning_end  # Evening continues until morning_end
+                }
             }
-        
-        # Get current rest times
-        weekday = datetime.now().strftime("%A").lower()
-        current_rest_times = self.config.get_rest_times(weekday)
-        
-        # Check if in holiday season
-        holiday_rest = self.config._get_holiday_rest_times()
-        if holiday_rest:
-            current_rest_times = holiday_rest
-        
-        # Calculate original rest time duration
-        original_duration = self.config.calculate_rest_time_duration(current_rest_times)
-        
-        # Determine new values
-        new_evening_start = evening_start if evening_start is not None else current_rest_times["evening"]["start"]
-        new_morning_end = morning_end if morning_end is not None else current_rest_times["morning"]["end"]
-        
-        # Evening rest time continues uninterrupted until morning_end
-        # Morning rest time starts at midnight (00:00) and ends at morning_end
-        new_rest_times = {
-            "morning": {
-                "start": "00:00",  # Morning always starts at midnight
-                "end": new_morning_end
-            },
-            "evening": {
-                "start": new_evening_start,
-                "end": new_morning_end  # Evening continues until morning_end
+            
+            # Calculate new rest time duration
+            new_duration = self.config.calculate_rest_time_duration(new_rest_times, now)
+            
+            # Calculate the ratio and adjust daily limit
+            if original_duration > 0:
+                ratio = new_duration / original_duration
+            else:
+                # If original duration is 0, we can't calculate ratio
+                # Just use a default adjustment
+                ratio = 1.0
+            
+            # Get base limit
+            current_limit = self._get_base_daily_limit()[0]
+            
+            # Adjust limit proportionally
+            adjusted_limit = int(current_limit * ratio)
+            
+            # Store the modification
+            self.today_data["rest_time_modification"] = {
+                "original_rest_times": current_rest_times.copy(),
+                "new_rest_times": new_rest_times.copy(),
+                "original_duration": original_duration,
+                "new_duration": new_duration,
+                "original_limit": current_limit,
+                "adjusted_limit": adjusted_limit,
+                "ratio": ratio,
+                "modified_at": now.isoformat()
+            }
+            
+            # Save the data
+            self._dirty = True
+            self._save_today_data(force=True)
+            
+            logger.info(
+                f"Rest time modified for today: "
+                f"original duration {original_duration}s, new duration {new_duration}s, "
+                f"limit adjusted from {current_limit}s to {adjusted_limit}s"
+            )
+            
+            return {
+                "status": "ok",
+                "message": "Rest time modified successfully",
+                "original_rest_times": current_rest_times,
+                "new_rest_times": new_rest_times,
+                "original_duration": original_duration,
+                "new_duration": new_duration,
+                "original_limit": current_limit,
+                "adjusted_limit": adjusted_limit,
+                "ratio": ratio
             }
-        }
-        
-        # Calculate new rest time duration
-        new_duration = self.config.calculate_rest_time_duration(new_rest_times)
-        
-        # Calculate the ratio and adjust daily limit
-        if original_duration > 0:
-            ratio = new_duration / original_duration
-        else:
-            # If original duration is 0, we can't calculate ratio
-            # Just use a default adjustment
-            ratio = 1.0
-        
-        # Get base limit
-        base_limit = self.config.get_daily_limit(weekday)
-        multiplier = self.config.get_holiday_limit_multiplier()
-        current_limit = int(base_limit * multiplier)
-        
-        # Adjust limit proportionally
-        adjusted_limit = int(current_limit * ratio)
-        
-        # Store the modification
-        self.today_data["rest_time_modification"] = {
-            "original_rest_times": current_rest_times.copy(),
-            "new_rest_times": new_rest_times.copy(),
-            "original_duration": original_duration,
-            "new_duration": new_duration,
-            "original_limit": current_limit,
-            "adjusted_limit": adjusted_limit,
-            "ratio": ratio,
-            "modified_at": datetime.now().isoformat()
-        }
-        
-        # Save the data
-        self._save_today_data(force=True)
-        
-        logger.info(
-            f"Rest time modified for today: "
-            f"original duration {original_duration}s, new duration {new_duration}s, "
-            f"limit adjusted from {current_limit}s to {adjusted_limit}s"
-        )
-        
-        return {
-            "status": "ok",
-            "message": "Rest time modified successfully",
-            "original_rest_times": current_rest_times,
-            "new_rest_times": new_rest_times,
-            "original_duration": original_duration,
-            "new_duration": new_duration,
-            "original_limit": current_limit,
-            "adjusted_limit": adjusted_limit,
-            "ratio": ratio
-        }
     
     def set_temporary_denylisted_usage(self, minutes: int) -> Dict:
         """
@@ -605,61 +1178,61 @@ class TimeTracker:
         Returns:
             Dict with status, message, and details about the modification
         """
-        # Convert minutes to seconds
-        seconds = minutes * 60
-        
-        # Get base limit
-        weekday = datetime.now().strftime("%A").lower()
-        base_limit = self.config.get_daily_limit(weekday)
-        multiplier = self.config.get_holiday_limit_multiplier()
-        base_limit = int(base_limit * multiplier)
-        
-        # Apply rest time modification if it exists
-        if "rest_time_modification" in self.today_data:
-            modification = self.today_data["rest_time_modification"]
-            if "adjusted_limit" in modification:
-                base_limit = modification["adjusted_limit"]
-        
-        # Calculate new adjusted limit
-        new_limit = max(0, base_limit + seconds)  # Ensure limit doesn't go negative
-        
-        # Get current actual usage for reference
-        actual_denylisted = self.today_data.get("total_denylisted", 0)
-        
-        # Add current session if tracking
-        if self.current_app and self.current_start_time:
-            reference_time = self.last_progress_time or self.current_start_time
-            current_duration = max(0, time_module.time() - reference_time)
-            if self.config.is_denylisted(self.current_app):
-                actual_denylisted += current_duration
-            elif not self.config.is_allowlisted(self.current_app):
-                if not self.config.is_rest_time():
+        with self._lock:
+            # Convert minutes to seconds
+            seconds = minutes * 60
+            
+            # Get base limit
+            base_limit = self._get_base_daily_limit()[0]
+            
+            # Apply rest time modification if it exists
+            if "rest_time_modification" in self.today_data:
+                modification = self.today_data["rest_time_modification"]
+                if "adjusted_limit" in modification:
+                    base_limit = modification["adjusted_limit"]
+            
+            # Calculate new adjusted limit
+            new_limit = max(0, base_limit + seconds)  # Ensure limit doesn't go negative
+            
+            # Get current actual usage for reference
+            actual_denylisted = self.today_data.get("total_denylisted", 0)
+            
+            # Add current session if tracking
+            if self.current_app and self.current_start_time:
+                reference_time = self.last_progress_time or self._current_start_mono
+                current_duration = max(0, time_module.monotonic() - reference_time)
+                kind = self._classify(self.current_app)
+                if kind == "deny":
                     actual_denylisted += current_duration
-        
-        # Store the temporary adjustment value (in seconds internally)
-        self.today_data["temporary_denylisted_usage"] = seconds
-        
-        # Save the data
-        self._save_today_data(force=True)
-        
-        logger.info(
-            f"Temporary denylisted_usage adjustment set for today: "
-            f"base limit {base_limit}s ({base_limit // 60}m), "
-            f"adjustment {seconds}s ({minutes}m), "
-            f"new limit {new_limit}s ({new_limit // 60}m), "
-            f"actual usage {actual_denylisted}s ({actual_denylisted // 60}m)"
-        )
-        
-        return {
-            "status": "ok",
-            "message": "Temporary denylisted_usage adjustment set successfully",
-            "base_limit": base_limit,
-            "adjustment_seconds": seconds,
-            "adjustment_minutes": minutes,
-            "new_limit": new_limit,
-            "actual_denylisted": actual_denylisted,
-            "remaining": max(0, new_limit - actual_denylisted)
-        }
+                elif kind == "unknown":
+                    if not self._is_rest_time():
+                        actual_denylisted += current_duration
+            
+            # Store the temporary adjustment value (in seconds internally)
+            self.today_data["temporary_denylisted_usage"] = seconds
+            
+            # Save the data
+            self._dirty = True
+            self._save_today_data(force=True)
+            
+            logger.info(
+                f"Temporary denylisted_usage adjustment set for today: "
+                f"base limit {base_limit}s ({base_limit // 60}m), "
+                f"adjustment {seconds}s ({minutes}m), "
+                f"new limit {new_limit}s ({new_limit // 60}m), "
+                f"actual usage {actual_denylisted}s ({actual_denylisted // 60}m)"
+            )
+            
+            return {
+                "status": "ok",
+                "message": "Temporary denylisted_usage adjustment set successfully",
+                "base_limit": base_limit,
+                "adjustment_seconds": seconds,
+                "adjustment_minutes": minutes,
+                "new_limit": new_limit,
+                "actual_denylisted": actual_denylisted,
+                "remaining": max(0, new_limit - actual_denylisted)
+            }
     
     def is_limit_exceeded(self) -> bool:
         """Check if daily limit is exceeded."""
@@ -669,25 +1242,26 @@ class TimeTracker:
         """Get detailed statistics for today."""
         denylisted, allowlisted = self.get_current_usage()
         adjusted_limit = self.get_adjusted_daily_limit()
-        multiplier = self.config.get_holiday_limit_multiplier()
+        multiplier = self._get_base_daily_limit()[1]
+        remaining = max(0, adjusted_limit - denylisted)
         
         return {
-            "date": self.today_data.get("date", date.today().isoformat()),
+            "date": self.today_data.get("date", self._today_str),
             "denylisted_usage": denylisted,
             "allowlisted_usage": allowlisted,
             "daily_limit": adjusted_limit,
-            "remaining": self.get_remaining_time(),
-            "limit_exceeded": self.is_limit_exceeded(),
+            "remaining": remaining,
+            "limit_exceeded": remaining <= 0,
             "denylisted_apps": self.today_data.get("denylisted_usage", {}),
             "allowlisted_apps": self.today_data.get("allowlisted_usage", {}),
-            "total_sessions": len(self.today_data.get("sessions", [])),
-            "in_rest_time": self.config.is_rest_time(),
+            "total_sessions": self._session_count,
+            "in_rest_time": self._is_rest_time(),
             "holiday_mode": multiplier > 1.0,
             # Backward compatibility aliases
             "denylisted_usage_seconds": denylisted,
             "allowlisted_usage_seconds": allowlisted,
             "daily_limit_seconds": adjusted_limit,
-            "remaining_seconds": self.get_remaining_time(),
+            "remaining_seconds": remaining,
             "blacklisted_usage_seconds": denylisted,
             "whitelisted_usage_seconds": allowlisted,
             "blacklisted_apps": self.today_data.get("denylisted_usage", {}),
@@ -696,165 +1270,277 @@ class TimeTracker:
     
     def _get_history_file_path(self) -> Path:
         """Get path to history file."""
-        return self.data_directory / "history.json"
+        return self._history_file_path
     
     def _load_history(self) -> Dict:
         """Load 30-day history from file."""
         history_file = self._get_history_file_path()
+        history = None
         
         if history_file.exists():
             try:
-                with open(history_file, 'r') as f:
-                    history = json.load(f)
-                    # Clean up old entries (keep only last 30 days)
-                    self._cleanup_history(history)
-                    return history
-            except (json.JSONDecodeError, IOError) as e:
+                if IJSON_AVAILABLE:
+                    try:
+                        history = self._stream_history(history_file)
+                    except ijson.JSONError as e:
+                        logger.debug("Streaming history failed, parsing it in full: %s", e)
+                if history is None:
+                    with open(history_file, 'rb') as f:
+                        history = json_loads(f.read())
+                    history["days"] = self._sort_history_days(history.get("days", {}))
+            except (json.JSONDecodeError, IOError, AttributeError) as e:
                 logger.warning(f"Error loading history file: {e}")
+                history = None
+        
+        if history is None:
+            history = {
+                "last_updated": _iso(time_module.time()),
+                "days": OrderedDict()
+            }
+        self._replay_history_log(history)
+        # Clean up old entries (keep only last 30 days)
+        self._cleanup_history(history)
+        return history
+    
+    def _replay_history_log(self, history: Dict):
+        """Apply the day entries appended to the history log since history.json was written."""
+        days = history["days"]
+        added = False
+        try:
+            with open(self._history_log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        entry = json_loads(line)
+                        date_str = entry["date"]
+                        apps = entry["apps"]
+                    except (json.JSONDecodeError, KeyError, TypeError):
+                        # Most likely a line cut short by a crash, skip it
+                        continue
+                    added = added or date_str not in days
+                    # Entries are whole days, a later one replaces an earlier one
+                    days[date_str] = apps
+                    self._history_log_entries += 1
+        except FileNotFoundError:
+            return
+        except IOError as e:
+            logger.warning(f"Error replaying history log: {e}")
+        if added:
+            history["days"] = self._sort_history_days(days)
+    
+    def _stream_history(self, history_file: Path) -> Dict:
+        """
+        Load history with ijson, skipping expired days while parsing.
         
+        Only the days are read, last_updated is taken from the file's
+        modification time.
+        """
+        cutoff_str = self._history_cutoff_str
+        days = {}
+        with open(history_file, 'rb') as f:
+            for date_str, apps in ijson.kvitems(f, "days", use_float=True):
+                if date_str >= cutoff_str:
+                    days[date_str] = apps
         return {
-            "last_updated": datetime.now().isoformat(),
-            "days": {}
+            "last_updated": _iso(history_file.stat().st_mtime),
+            "days": self._sort_history_days(days)
         }
     
+    def _sort_history_days(self, days: Dict) -> OrderedDict:
+        """Order history days by date, dropping entries that aren't keyed by a date."""
+        valid_days = [
+            (date_str, apps) for date_str, apps in days.items()
+            if isinstance(date_str, str) and _ISO_DATE_RE.fullmatch(date_str)
+        ]
+        # ISO dates sort chronologically as plain strings
+        return OrderedDict(sorted(valid_days))
+    
     def _cleanup_history(self, history: Dict):
-        """Remove entries older than 30 days."""
-        cutoff_date = date.today() - timedelta(days=30)
-        days = history.get("days", {})
-        
-        dates_to_remove = []
-        for date_str in days.keys():
-            try:
-                entry_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-                if entry_date < cutoff_date:
-                    dates_to_remove.append(date_str)
-            except ValueError:
-                dates_to_remove.append(date_str)
-        
-        for date_str in dates_to_remove:
-            del days[date_str]
+        """Remove entries older than _HISTORY_DAYS days."""
+        cutoff_str = self._history_cutoff_str
+        days = history["days"]
+        
+        # Days are kept in date order (see _sort_history_days), so expired
+        # entries are always at the front
+        while days and next(iter(days)) < cutoff_str:
+            days.popitem(last=False)
     
     def _update_history(self):
         """Update history with current day's usage."""
-        # Don't acquire lock here - caller should already have it
-        today_str = date.today().isoformat()
-        
-        if "days" not in self.history:
-            self.history["days"] = {}
-        
-        # Combine denylisted and allowlisted usage
-        combined_usage = {}
-        
-        # Add denylisted usage
-        for app, seconds in self.today_data.get("denylisted_usage", {}).items():
-            if app not in combined_usage:
-                combined_usage[app] = 0
-            combined_usage[app] += seconds
+        today_str = self._today_str
         
-        # Add allowlisted usage
-        for app, seconds in self.today_data.get("allowlisted_usage", {}).items():
-            if app not in combined_usage:
-                combined_usage[app] = 0
-            combined_usage[app] += seconds
+        combined_usage = self._today_combined
+        today_entry = {app: int(seconds) for app, seconds in combined_usage.items()}
         
-        # Add current session if tracking
+        # Add the part of the current session not yet recorded by _record_progress,
+        # it only changes the entry of the current app
         if self.current_app and self.current_start_time:
-            current_duration = time_module.time() - self.current_start_time
-            if self.current_app not in combined_usage:
-                combined_usage[self.current_app] = 0
-            combined_usage[self.current_app] += current_duration
+            reference_time = self.last_progress_time or self._current_start_mono
+            current_duration = max(0, time_module.monotonic() - reference_time)
+            app = self.current_app
+            today_entry[app] = int(combined_usage[app] + current_duration)
+        
+        # Build the new history next to the current one, the day entries
+        # themselves are never modified and can be shared
+        new_history = {"days": OrderedDict(self.history["days"])}
         
         # Update history for today
-        self.history["days"][today_str] = {
-            app: int(seconds) for app, seconds in combined_usage.items()
-        }
+        new_history["days"][today_str] = today_entry
         
         # Clean up old entries
-        self._cleanup_history(self.history)
+        self._cleanup_history(new_history)
         
         # Update timestamp
-        self.history["last_updated"] = datetime.now().isoformat()
+        new_history["last_updated"] = _iso(time_module.time())
+        
+        # Publish with a single attribute assignment, which is atomic
+        self.history = new_history
     
-    def save_history(self):
-        """Save history to file."""
-        # Use non-blocking lock acquisition to avoid hanging
-        lock_acquired = False
-        try:
-            logger.debug("Attempting to acquire history lock...")
-            # Try to acquire lock (non-blocking)
-            lock_acquired = self.history_lock.acquire(blocking=False)
-            if not lock_acquired:
-                logger.warning("History lock is busy, skipping save (will retry on next cycle)")
+    def save_history(self, force: bool = False):
+        """
+        Save history to file.
+        
+        Periodic saves only append today's entry to the history log. The full
+        history file is rewritten, and the log emptied, when forced (day
+        rollover, shutdown) or once the log has grown long.
+        
+        Args:
+            force: If True, rewrite the full history file
+        """
+        # Nothing to add if no usage was recorded since the last save and no
+        # session is running
+        if self._last_increment_t <= self._last_history_save_t and self.current_app is None:
+            if not force or self._history_log_entries == 0:
+                logger.debug("History unchanged, skipping save")
                 return
+        
+        if not self._acquire_history_lock():
+            logger.warning("History is locked by another screentime instance, skipping save")
+            return
+        
+        try:
+            # Update history before saving
+            self._update_history()
+            logger.debug("History updated")
+            
+            # Work on a snapshot, self.history may be replaced meanwhile
+            history = self.history
+            history_file = self._get_history_file_path()
+            logger.debug("Saving history to: %s", history_file)
             
-            logger.debug("History lock acquired, updating history...")
             try:
-                # Update history before saving
-                self._update_history()
-                logger.debug("History updated")
-                
-                history_file = self._get_history_file_path()
-                logger.debug(f"Saving history to: {history_file}")
-                
-                # Save to temporary file first, then rename (atomic operation)
-                temp_file = history_file.with_suffix('.tmp')
-                try:
-                    logger.debug(f"Writing to temp file: {temp_file}")
-                    with open(temp_file, 'w') as f:
-                        json.dump(self.history, f, indent=2)
-                    logger.debug("JSON written, renaming file...")
-                    # Atomic rename
-                    temp_file.replace(history_file)
-                    logger.debug("History file saved successfully")
-                except IOError as e:
-                    logger.error(f"Error saving history file: {e}")
-                    # Clean up temp file if it exists
-                    if temp_file.exists():
-                        try:
-                            temp_file.unlink()
-                        except:
-                            pass
-            finally:
-                if lock_acquired:
-                    logger.debug("Releasing history lock...")
-                    self.history_lock.release()
-                    logger.debug("History lock released")
+                if force or self._history_log_entries >= _HISTORY_LOG_COMPACT_ENTRIES:
+                    blob = json_dumps(history, indent=logger.isEnabledFor(logging.DEBUG))
+                    self._write_atomic(history_file, blob, self._truncate_history_log)
+                else:
+                    self._append_history_log(self._today_str, history["days"][self._today_str])
+                self._last_history_save_t = self._last_increment_t
+                logger.debug("History file saved successfully")
+            except (IOError, OSError) as e:
+                logger.error(f"Error saving history file: {e}")
         except Exception as e:
             logger.error(f"Unexpected error in save_history: {e}", exc_info=True)
-            if lock_acquired:
-                try:
-                    self.history_lock.release()
-                except:
-                    pass
     
-    def get_history(self) -> Dict:
-        """Get a copy of the current history."""
-        with self.history_lock:
-            # Return a deep copy to avoid race conditions
-            return json.loads(json.dumps(self.history))
-    
-    def stop(self):
-        """Stop tracking and save data."""
-        try:
-            logger.info("Stopping tracker: ending current session...")
-            self._end_current_session()
-            logger.info("Stopping tracker: session ended")
-        except Exception as e:
-            logger.error(f"Error ending session: {e}", exc_info=True)
+    def _acquire_history_lock(self) -> bool:
+        """
+        Take the inter-process lock on the history files, if not held already.
         
-        try:
-            logger.info("Stopping tracker: saving today's data...")
-            self._save_today_data(force=True)  # Force save on shutdown
-            logger.info("Stopping tracker: today's data saved")
-        except Exception as e:
-            logger.error(f"Error saving today's data: {e}", exc_info=True)
+        The lock is kept until stop(), which also covers renames deferred by
+        _batched_commits. Without fcntl (non-POSIX) there is no lock.
         
+        Returns:
+            True if this instance may write history, False if another one holds the lock
+        """
+        if not FCNTL_AVAILABLE or self._history_lock_fd is not None:
+            return True
+        lock_file = self.data_directory / "history.lock"
+        fd = os.open(lock_file, os.O_CREAT | os.O_RDWR, 0o600)
         try:
-            logger.info("Stopping tracker: saving history...")
-            self.save_history()
-            logger.info("Stopping tracker: history saved")
-        except Exception as e:
-            logger.error(f"Error saving history: {e}", exc_info=True)
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._history_lock_fd = fd
+        return True
+    
+    def _release_history_lock(self):
+        """Release the lock taken by _acquire_history_lock."""
+        if self._history_lock_fd is not None:
+            try:
+                os.close(self._history_lock_fd)  # Closing releases the flock
+            except OSError:
+                pass
+            self._history_lock_fd = None
+    
+    def _append_history_log(self, date_str: str, apps: Dict):
+        """Append a day's history entry to the history log."""
+        with open(self._history_log_path, 'ab') as f:
+            f.write(json_dumps({"date": date_str, "apps": apps}) + b"\n")
+        self._history_log_entries += 1
+    
+    def _truncate_history_log(self):
+        """Remove the history log after the full history file was written."""
+        try:
+            self._history_log_path.unlink()
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"Error removing history log: {e}")
+        self._history_log_entries = 0
+    
+    def get_history(self, last_n_days: Optional[int] = None) -> Dict:
+        """
+        Get a copy of the current history.
         
-        logger.info("Stopping tracker: completed")
+        Args:
+            last_n_days: If given, only copy the most recent days, up to this many
+            
+        Returns:
+            History dictionary with "last_updated" and "days"
+        """
+        # self.history is only ever replaced, never modified, so a reference
+        # to it is a consistent snapshot. History is {date: {app: seconds}},
+        # copying both levels keeps callers from modifying it
+        history = self.history
+        days = history.get("days", {})
+        if last_n_days is None:
+            items = days.items()
+        else:
+            # Days are kept in date order, take them from the end
+            items = list(islice(reversed(days.items()), max(0, last_n_days)))
+            items.reverse()
+        return {
+            "last_updated": history.get("last_updated"),
+            "days": {day: dict(apps) for day, apps in items}
+        }
+    
+    def stop(self):
+        """Stop tracking and save data."""
+        with self._lock:
+            try:
+                logger.info("Stopping tracker: ending current session...")
+                self._end_current_session()
+                logger.info("Stopping tracker: session ended")
+            except Exception as e:
+                logger.error(f"Error ending session: {e}", exc_info=True)
+            
+            # Both files are written back to disk together
+            with self._batched_commits():
+                try:
+                    logger.info("Stopping tracker: saving today's data...")
+                    self._save_today_data(force=True)  # Force save on shutdown
+                    logger.info("Stopping tracker: today's data saved")
+                except Exception as e:
+                    logger.error(f"Error saving today's data: {e}", exc_info=True)
+                
+                try:
+                    logger.info("Stopping tracker: saving history...")
+                    self.save_history(force=True)
+                    logger.info("Stopping tracker: history saved")
+                except Exception as e:
+                    logger.error(f"Error saving history: {e}", exc_info=True)
+            
+            self._close_delta_file()
+            self._release_history_lock()
+            
+            logger.info("Stopping tracker: completed")
 
@@ -17,10 +17,11 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import os
+import select
 import signal
 import time
 import logging
-from typing import Dict
+from typing import Dict, Optional
 
 from utils.notifications import Notifier
 
@@ -55,16 +56,20 @@ def _can_kill_process(pid: int) -> bool:
         return False
 
 
-def _is_process_running(pid: int) -> bool:
+def _is_process_running(pid: int, pidfd: Optional[int] = None) -> bool:
     """
     Check if a process is still running.
     
     Args:
         pid: Process ID to check
+        pidfd: Optional pidfd for the process (see _open_pidfd). Checking it
+            can't be confused by the PID being reused by a new process.
         
     Returns:
         True if process is running, False otherwise
     """
+    if pidfd is not None:
+        return not _wait_pidfd(pidfd, 0)
     try:
         # Signal 0 doesn't actually send a signal, just checks if process exists
         os.kill(pid, 0)
@@ -81,6 +86,42 @@ def _is_process_running(pid: int) -> bool:
         return False
 
 
+def _open_pidfd(pid: int) -> Optional[int]:
+    """
+    Open a pidfd for a process (Linux 5.3+, Python 3.9+).
+    
+    Args:
+        pid: Process ID
+        
+    Returns:
+        File descriptor referring to the process, or None if not supported
+    """
+    if not hasattr(os, "pidfd_open"):
+        return None
+    try:
+        return os.pidfd_open(pid)
+    except OSError:
+        # Not supported by the kernel, or the process is already gone, which
+        # the caller finds out when signalling it
+        return None
+
+
+def _wait_pidfd(pidfd: int, timeout: float) -> bool:
+    """
+    Wait for the process behind a pidfd to exit.
+    
+    Args:
+        pidfd: File descriptor from _open_pidfd
+        timeout: Maximum time to wait in seconds
+        
+    Returns:
+        True if the process exited, False on timeout
+    """
+    poller = select.poll()
+    poller.register(pidfd, select.POLLIN)
+    return bool(poller.poll(int(timeout * 1000)))
+
+
 class ProcessManager:
     """Manages process termination and enforcement."""
     
@@ -94,7 +135,7 @@ class ProcessManager:
         """
         self.notifier = notifier
         self.kill_cooldown = kill_cooldown
-        self.last_kill_attempt: Dict[int, float] = {}  # Track last kill attempt per PID
+        self.last_kill_attempt: Dict[int, float] = {}  # Last kill attempt per PID (monotonic)
     
     def kill_process(self, pid: int, app_name: str, reason: str = "") -> bool:
         """
@@ -114,7 +155,7 @@ class ProcessManager:
         if not pid or pid <= 0:
             return False
         
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Check cooldown to avoid killing too frequently
         if pid in self.last_kill_attempt:
@@ -133,6 +174,9 @@ class ProcessManager:
             )
             return False
         
+        # Opened before signalling, so the wait can't mix it up with a new
+        # process that reuses the PID
+        pidfd = _open_pidfd(pid)
         try:
             # Try graceful termination first (SIGTERM)
             os.kill(pid, signal.SIGTERM)
@@ -141,26 +185,40 @@ class ProcessManager:
             
             # Wait up to 15 seconds for the process to terminate gracefully
             wait_timeout = 15.0
-            check_interval = 0.5  # Check every 500ms
-            elapsed = 0.0
+            if pidfd is not None:
+                # Woken up as soon as the process exits
+                terminated = _wait_pidfd(pidfd, wait_timeout)
+            else:
+                check_interval = 0.5  # Check every 500ms
+                deadline = current_time + wait_timeout
+                terminated = False
+                while time.monotonic() < deadline:
+                    time.sleep(check_interval)
+                    
+                    if not _is_process_running(pid):
+                        terminated = True
+                        break
+            elapsed = time.monotonic() - current_time
             
-            while elapsed < wait_timeout:
-                time.sleep(check_interval)
-                elapsed += check_interval
-                
-                if not _is_process_running(pid):
-                    # Process terminated gracefully
-                    logger.info(f"Process {app_name} (PID: {pid}) terminated gracefully after {elapsed:.1f}s")
-                    break
+            if terminated:
+                # Process terminated gracefully
+                logger.info(f"Process {app_name} (PID: {pid}) terminated gracefully after {elapsed:.1f}s")
             else:
                 # Process is still running after timeout, force kill with SIGKILL
-                if _is_process_running(pid):
+                if _is_process_running(pid, pidfd):
                     try:
-                        os.kill(pid, signal.SIGKILL)
+                        if pidfd is not None:
+                            signal.pidfd_send_signal(pidfd, signal.SIGKILL)
+                        else:
+                            os.kill(pid, signal.SIGKILL)
                         logger.warning(f"Sent SIGKILL to {app_name} (PID: {pid}) - Process did not respond to SIGTERM")
                         # Wait a bit to see if SIGKILL worked
-                        time.sleep(0.5)
-                        if not _is_process_running(pid):
+                        if pidfd is not None:
+                            killed = _wait_pidfd(pidfd, 0.5)
+                        else:
+                            time.sleep(0.5)
+                            killed = not _is_process_running(pid)
+                        if killed:
                             logger.info(f"Process {app_name} (PID: {pid}) terminated with SIGKILL")
                         else:
                             logger.warning(f"Process {app_name} (PID: {pid}) may still be running after SIGKILL")
@@ -200,4 +258,7 @@ class ProcessManager:
         except Exception as e:
             logger.error(f"Error killing process {app_name} (PID: {pid}): {e}")
             return False
+        finally:
+            if pidfd is not None:
+                os.close(pidfd)
 
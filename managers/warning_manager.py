@@ -37,12 +37,13 @@ class WarningManager:
         """
         self.notifier = notifier
     
-    def check_and_notify(self, stats: dict) -> bool:
+    def check_and_notify(self, stats: dict, now: Optional[datetime] = None) -> bool:
         """
         Check conditions and send notification if needed.
         
         Args:
             stats: Current statistics dictionary
+            now: Current time, taken once per tick by the caller (defaults to datetime.now())
             
         Returns:
             True if notification was sent, False otherwise
@@ -67,7 +68,7 @@ class RestTimeWarningManager(WarningManager):
         self.minutes_before = minutes_before
         self.warning_shown: Optional[datetime] = None
     
-    def check_and_notify(self, stats: dict) -> bool:
+    def check_and_notify(self, stats: dict, now: Optional[datetime] = None) -> bool:
         """Check if rest time is approaching and show notification."""
         if stats.get("in_rest_time", False):
             # Reset warning when rest time actually starts
@@ -77,7 +78,7 @@ class RestTimeWarningManager(WarningManager):
             return False
         
         is_approaching, rest_time_start = self.config_manager.is_rest_time_approaching(
-            minutes_before=self.minutes_before
+            minutes_before=self.minutes_before, now=now
         )
         
         if is_approaching and rest_time_start:
@@ -96,8 +97,9 @@ class RestTimeWarningManager(WarningManager):
         else:
             # Reset warning if we're no longer in the warning window
             if self.warning_shown and rest_time_start:
-                from datetime import datetime
-                time_until_rest = (rest_time_start - datetime.now()).total_seconds() / 60
+                if now is None:
+                    now = datetime.now()
+                time_until_rest = (rest_time_start - now).total_seconds() / 60
                 if time_until_rest > self.minutes_before or time_until_rest < 0:
                     self.warning_shown = None
         
@@ -117,9 +119,10 @@ class LimitWarningManager(WarningManager):
         """
         super().__init__(notifier)
         self.warning_thresholds = warning_thresholds or [15, 10, 5, 4, 3, 2, 1]
+        self._threshold_set = frozenset(self.warning_thresholds)
         self.warnings_shown: Set[int] = set()
     
-    def check_and_notify(self, stats: dict) -> bool:
+    def check_and_notify(self, stats: dict, now: Optional[datetime] = None) -> bool:
         """Check if limit is approaching and show notification."""
         if stats.get("limit_exceeded", False):
             # Reset warnings when limit is exceeded
@@ -134,14 +137,11 @@ class LimitWarningManager(WarningManager):
         remaining_seconds = stats.get("remaining", 0)
         remaining_minutes = remaining_seconds // 60
         
-        for threshold in self.warning_thresholds:
-            # Check if we're at or just passed this threshold
-            if threshold == 1:
-                is_at_threshold = 0 <= remaining_minutes <= 1
-            else:
-                is_at_threshold = (threshold - 1) < remaining_minutes <= threshold
-            
-            if is_at_threshold and threshold not in self.warnings_shown:
+        # Whole minutes only ever match the threshold of the same value, the
+        # 1 minute threshold also covers the last minute
+        candidates = (remaining_minutes, 1) if remaining_minutes == 0 else (remaining_minutes,)
+        for threshold in candidates:
+            if threshold in self._threshold_set and threshold not in self.warnings_shown:
                 # Show notification
                 if remaining_minutes == 1:
                     message = f"Only 1 minute of screen time remaining! Denylisted applications will be closed when limit is reached."
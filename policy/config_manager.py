@@ -21,14 +21,27 @@ import os
 import re
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from datetime import datetime, time, timedelta
+from datetime import date, datetime, time, timedelta
 import logging
 
+from utils.common import WEEKDAYS, json_loads
+
 logger = logging.getLogger(__name__)
 
 # Import default config path
 _CONFIG_DIR = Path(__file__).parent.parent / "config"
 
+# Characters that make a list entry a regex rather than a plain app name
+_REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+# Maximum number of app names remembered by ConfigManager.classify
+_CLASSIFY_CACHE_SIZE = 4096
+
+
+def _current_weekday() -> str:
+    """Get the lowercase name of the current weekday, as used for config keys."""
+    return WEEKDAYS[date.today().weekday()]
+
 
 class ConfigManager:
     """Manages application configuration."""
@@ -57,11 +70,10 @@ class ConfigManager:
         """Load configuration from file or create default."""
         if self.config_path.exists():
             try:
-                with open(self.config_path, 'r') as f:
-                    config = json.load(f)
+                config = json_loads(self.config_path.read_bytes())
                 logger.info(f"Loaded configuration from {self.config_path}")
                 return config
-            except json.JSONDecodeError as e:
+            except json.JSONDecodeError as e:  # orjson's decode error subclasses it
                 logger.error(f"Error parsing config file: {e}")
                 logger.info("Using default configuration")
                 return self._get_default_config()
@@ -74,8 +86,7 @@ class ConfigManager:
         default_path = _CONFIG_DIR / "default_config.json"
         if default_path.exists():
             try:
-                with open(default_path, 'r') as f:
-                    return json.load(f)
+                return json_loads(default_path.read_bytes())
             except Exception as e:
                 logger.warning(f"Could not load default config: {e}")
         
@@ -98,7 +109,7 @@ class ConfigManager:
                     "morning": {"start": "00:00", "end": "08:00"},
                     "evening": {"start": "21:00", "end": "23:59"}
                 }
-                for day in ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+                for day in WEEKDAYS
             },
             "holiday_seasons": [],
             "tracking_interval": 1,
@@ -113,8 +124,7 @@ class ConfigManager:
                 raise ValueError(f"Missing required configuration key: {key}")
         
         # Validate weekday limits
-        weekdays = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-        for day in weekdays:
+        for day in WEEKDAYS:
             if day not in self.config["weekday_limits"]:
                 logger.warning(f"Missing weekday limit for {day}, using default")
                 self.config["weekday_limits"][day] = self.config["daily_limit"]
@@ -125,32 +135,149 @@ class ConfigManager:
                     "morning": {"start": "00:00", "end": "08:00"},
                     "evening": {"start": "21:00", "end": "23:59"}
                 }
+        
+        # Compile the list patterns once, _matches_list runs on every tick
+        self._allowlist_matcher = self._build_list_matcher("allowlist")
+        self._denylist_matcher = self._build_list_matcher("denylist")
+        self._classify_cache: Dict[str, str] = {}
+        # Parse the rest times once, is_rest_time runs on every tick
+        self._rest_times_parsed = {
+            day: self._parse_rest_times(rest_times)
+            for day, rest_times in self.config["rest_times"].items()
+        }
+        self._holidays = self._parse_holiday_seasons()
+        self._holiday_cache_date = None  # Date _holiday_cache_entry was looked up for
+        self._holiday_cache_entry = None  # Holiday season active on that date, if any
+        self._holiday_cache_rest = None  # Parsed rest times of that holiday season
+        self._tracking_interval = self.config.get("tracking_interval", 1)
+        self._data_directory = Path(os.path.expanduser(self.config.get("data_directory", "~/.screentime")))
+    
+    def _build_list_matcher(self, list_name: str) -> Tuple:
+        """
+        Prepare the entries of a list for matching.
+        
+        All entries go into the combined pattern. Entries without regex
+        metacharacters are plain app names, an app name equal to one of them
+        is matched by a set lookup without searching.
+        
+        Args:
+            list_name: Name of the list ('allowlist' or 'denylist')
+            
+        Returns:
+            Tuple of (lowercased plain entries, patterns from
+            _compile_list_patterns, combined pattern from _compile_union)
+        """
+        entries = self.config.get(list_name, [])
+        literals = frozenset(
+            entry.lower() for entry in entries if _REGEX_METACHARACTERS.isdisjoint(entry)
+        )
+        patterns = self._compile_list_patterns(list_name, entries)
+        return literals, patterns, self._compile_union(patterns)
+    
+    def _compile_list_patterns(self, list_name: str,
+                               entries: List[str]) -> List[Tuple[str, "re.Pattern"]]:
+        """
+        Compile list entries into regex patterns.
+        
+        Invalid entries are logged and skipped.
+        
+        Args:
+            list_name: Name of the list the entries are from (for logging)
+            entries: Entries to compile
+            
+        Returns:
+            List of (entry, compiled pattern) tuples
+        """
+        patterns = []
+        for entry in entries:
+            try:
+                patterns.append((entry, re.compile(entry.lower())))
+            except re.error as e:
+                logger.warning(f"Invalid regex pattern for {list_name} entry '{entry}': {e}")
+        return patterns
+    
+    def _compile_union(self, patterns: List[Tuple[str, "re.Pattern"]]) -> Optional["re.Pattern"]:
+        """
+        Combine compiled list patterns into a single alternation.
+        
+        One search of the alternation replaces a search per entry.
+        
+        Args:
+            patterns: List of (entry, compiled pattern) tuples from _compile_list_patterns
+            
+        Returns:
+            The combined pattern, or None if the list is empty or the entries
+            can't be combined (e.g. numbered backreferences or inline global flags)
+        """
+        if not patterns:
+            return None
+        # Group numbers shift in the alternation, so numbered backreferences
+        # would point at the wrong group
+        if any(pattern.groups and re.search(r"\\\d", pattern.pattern) for _, pattern in patterns):
+            return None
+        try:
+            return re.compile("|".join(f"(?:{pattern.pattern})" for _, pattern in patterns))
+        except re.error as e:
+            logger.debug(f"Cannot combine list patterns, matching them one by one: {e}")
+            return None
     
     def _matches_list(self, app_name: str, list_name: str) -> bool:
         """
         Check if application matches any entry in the specified list using regex matching.
         
         Args:
-            app_name: Application name to check (will be escaped to prevent regex injection)
+            app_name: Application name to check
             list_name: Name of the list to check ('allowlist' or 'denylist')
             
         Returns:
             True if the application matches any entry in the list, False otherwise
         """
-        # Escape the app_name to prevent regex injection from malicious window titles
-        app_lower = re.escape(app_name.lower())
-        list_entries = self.config.get(list_name, [])
-        
-        for entry in list_entries:
-            # Use the config entry as a regex pattern (allows regex in config)
-            # Search the escaped app_name against this pattern
-            pattern = entry.lower()
-            try:
-                if re.search(pattern, app_lower):
-                    return True
-            except re.error as e:
-                logger.warning(f"Invalid regex pattern for {list_name} entry '{entry}': {e}")
-        return False
+        # The config entries are the patterns, the app name is only the text
+        # searched, so it never needs escaping
+        matcher = getattr(self, f"_{list_name}_matcher")
+        if not matcher[1]:
+            return False
+        return self._search_list(app_name.lower(), matcher)
+    
+    @staticmethod
+    def _search_list(app_lower: str, matcher: Tuple) -> bool:
+        """Search a lowercased app name with a matcher from _build_list_matcher."""
+        literals, patterns, union = matcher
+        if app_lower in literals:
+            return True
+        if union is not None:
+            return union.search(app_lower) is not None
+        return any(pattern.search(app_lower) for _, pattern in patterns)
+    
+    def classify(self, app_name: str) -> str:
+        """
+        Classify an application against both lists at once.
+        
+        The denylist takes precedence over the allowlist.
+        
+        Args:
+            app_name: Application name to check
+            
+        Returns:
+            "deny", "allow" or "unknown"
+        """
+        kind = self._classify_cache.get(app_name)
+        if kind is not None:
+            return kind
+        
+        app_lower = app_name.lower()
+        if self._search_list(app_lower, self._denylist_matcher):
+            kind = "deny"
+        elif self._search_list(app_lower, self._allowlist_matcher):
+            kind = "allow"
+        else:
+            kind = "unknown"
+        
+        # Window titles can make for an unbounded number of names, drop the oldest
+        if len(self._classify_cache) >= _CLASSIFY_CACHE_SIZE:
+            del self._classify_cache[next(iter(self._classify_cache))]
+        self._classify_cache[app_name] = kind
+        return kind
     
     def is_allowlisted(self, app_name: str) -> bool:
         """Check if application is allowlisted using regex matching."""
@@ -172,36 +299,35 @@ class ConfigManager:
     def get_daily_limit(self, weekday: Optional[str] = None) -> int:
         """Get daily limit in seconds for given weekday."""
         if weekday is None:
-            weekday = datetime.now().strftime("%A").lower()
+            weekday = _current_weekday()
         
         return self.config["weekday_limits"].get(weekday, self.config["daily_limit"])
     
     def get_rest_times(self, weekday: Optional[str] = None) -> Dict:
         """Get rest times for given weekday."""
         if weekday is None:
-            weekday = datetime.now().strftime("%A").lower()
+            weekday = _current_weekday()
         
         return self.config["rest_times"].get(weekday, {
             "morning": {"start": "00:00", "end": "08:00"},
             "evening": {"start": "21:00", "end": "23:59"}
         })
     
-    def is_rest_time(self, current_time: Optional[time] = None) -> bool:
+    def is_rest_time(self, current_time: Optional[time] = None,
+                     now: Optional[datetime] = None) -> bool:
         """Check if current time is within rest period."""
+        if now is None:
+            now = datetime.now()
         if current_time is None:
-            current_time = datetime.now().time()
-        
-        weekday = datetime.now().strftime("%A").lower()
-        rest_times = self.get_rest_times(weekday)
+            current_time = now.time()
+        # Compare seconds since midnight, cheaper than comparing time objects
+        current_time = current_time.hour * 3600 + current_time.minute * 60 + current_time.second
         
-        # Check if in holiday season (extended rest times)
-        holiday_rest = self._get_holiday_rest_times()
-        if holiday_rest:
-            rest_times = holiday_rest
+        weekday = WEEKDAYS[now.weekday()]
+        rest_times = self._get_parsed_rest_times(weekday, now.date())
         
         # Check morning rest time
-        morning_start = self._parse_time(rest_times["morning"]["start"])
-        morning_end = self._parse_time(rest_times["morning"]["end"])
+        morning_start, morning_end = rest_times["morning_seconds"]
         
         if morning_start <= morning_end:
             if morning_start <= current_time <= morning_end:
@@ -211,8 +337,7 @@ class ConfigManager:
                 return True
         
         # Check evening rest time
-        evening_start = self._parse_time(rest_times["evening"]["start"])
-        evening_end = self._parse_time(rest_times["evening"]["end"])
+        evening_start, evening_end = rest_times["evening_seconds"]
         
         if evening_start <= evening_end:
             if evening_start <= current_time <= evening_end:
@@ -223,46 +348,106 @@ class ConfigManager:
         
         return False
     
-    def _get_holiday_rest_times(self) -> Optional[Dict]:
-        """Get extended rest times if currently in holiday season."""
-        today = datetime.now().date()
-        
-        for holiday in self.config.get("holiday_seasons", []):
-            try:
-                start_date = datetime.strptime(holiday["start_date"], "%Y-%m-%d").date()
-                end_date = datetime.strptime(holiday["end_date"], "%Y-%m-%d").date()
-                
-                if start_date <= today <= end_date:
-                    return {
-                        "morning": holiday.get("extended_rest_morning", {
-                            "start": "00:00", "end": "08:00"
-                        }),
-                        "evening": holiday.get("extended_rest_evening", {
-                            "start": "21:00", "end": "23:59"
-                        })
-                    }
-            except (KeyError, ValueError) as e:
-                logger.warning(f"Invalid holiday season config: {e}")
-                continue
+    def _parse_rest_times(self, rest_times: Dict) -> Dict[str, Tuple]:
+        """
+        Parse a rest times dict into time objects.
         
-        return None
+        Args:
+            rest_times: Rest times dict with morning/evening start/end
+            
+        Returns:
+            Dict mapping "morning" and "evening" to (start, end) time tuples,
+            "morning_seconds" and "evening_seconds" to the same as seconds
+            since midnight, and "duration" to the total rest time in seconds
+        """
+        parsed = {"duration": 0}
+        for period in ("morning", "evening"):
+            start = self._parse_time(rest_times[period]["start"])
+            end = self._parse_time(rest_times[period]["end"])
+            start_seconds = start.hour * 3600 + start.minute * 60
+            end_seconds = end.hour * 3600 + end.minute * 60
+            parsed[period] = (start, end)
+            parsed[f"{period}_seconds"] = (start_seconds, end_seconds)
+            # An end before the start spans midnight
+            parsed["duration"] += (end_seconds - start_seconds) % 86400
+        return parsed
     
-    def get_holiday_limit_multiplier(self) -> float:
-        """Get limit multiplier if in holiday season."""
-        today = datetime.now().date()
+    def _get_parsed_rest_times(self, weekday: str,
+                               today: Optional[date] = None) -> Dict[str, Tuple]:
+        """Get the parsed rest times for given weekday, or of the current holiday season."""
+        if self._get_holiday(today) is not None:
+            return self._holiday_cache_rest
+        parsed = self._rest_times_parsed.get(weekday)
+        if parsed is None:
+            parsed = self._parse_rest_times(self.get_rest_times(weekday))
+        return parsed
+    
+    def _parse_holiday_seasons(self) -> List[Tuple[date, date, Dict]]:
+        """
+        Parse the dates of the configured holiday seasons.
+        
+        Malformed entries are logged and skipped.
         
+        Returns:
+            List of (start date, end date, holiday season) tuples
+        """
+        holidays = []
         for holiday in self.config.get("holiday_seasons", []):
             try:
                 start_date = datetime.strptime(holiday["start_date"], "%Y-%m-%d").date()
                 end_date = datetime.strptime(holiday["end_date"], "%Y-%m-%d").date()
-                
-                if start_date <= today <= end_date:
-                    return holiday.get("extended_limit_multiplier", 1.0)
             except (KeyError, ValueError) as e:
                 logger.warning(f"Invalid holiday season config: {e}")
                 continue
-        
-        return 1.0
+            holidays.append((start_date, end_date, holiday))
+        return holidays
+    
+    def _get_holiday(self, today: Optional[date] = None) -> Optional[Dict]:
+        """Get the holiday season active today, looked up once per day."""
+        if not self._holidays:
+            # No holiday seasons configured, the common case
+            return None
+        if today is None:
+            today = date.today()
+        if today != self._holiday_cache_date:
+            self._holiday_cache_date = today
+            self._holiday_cache_entry = next(
+                (holiday for start_date, end_date, holiday in self._holidays
+                 if start_date <= today <= end_date),
+                None
+            )
+            self._holiday_cache_rest = None
+            if self._holiday_cache_entry is not None:
+                self._holiday_cache_rest = self._parse_rest_times(
+                    self._holiday_rest_times(self._holiday_cache_entry)
+                )
+        return self._holiday_cache_entry
+    
+    def _get_holiday_rest_times(self, now: Optional[datetime] = None) -> Optional[Dict]:
+        """Get extended rest times if currently in holiday season."""
+        holiday = self._get_holiday(now.date() if now is not None else None)
+        if holiday is None:
+            return None
+        return self._holiday_rest_times(holiday)
+    
+    @staticmethod
+    def _holiday_rest_times(holiday: Dict) -> Dict:
+        """Get the rest times of a holiday season."""
+        return {
+            "morning": holiday.get("extended_rest_morning", {
+                "start": "00:00", "end": "08:00"
+            }),
+            "evening": holiday.get("extended_rest_evening", {
+                "start": "21:00", "end": "23:59"
+            })
+        }
+    
+    def get_holiday_limit_multiplier(self, now: Optional[datetime] = None) -> float:
+        """Get limit multiplier if in holiday season."""
+        holiday = self._get_holiday(now.date() if now is not None else None)
+        if holiday is None:
+            return 1.0
+        return holiday.get("extended_limit_multiplier", 1.0)
     
     def _parse_time(self, time_str: str) -> time:
         """Parse time string (HH:MM) to time object."""
@@ -275,34 +460,32 @@ class ConfigManager:
     
     def get_tracking_interval(self) -> int:
         """Get tracking interval in seconds."""
-        return self.config.get("tracking_interval", 1)
+        return self._tracking_interval
     
     def get_data_directory(self) -> Path:
         """Get data directory path."""
-        data_dir = os.path.expanduser(self.config.get("data_directory", "~/.screentime"))
-        return Path(data_dir)
+        return self._data_directory
     
-    def get_next_rest_time_start(self) -> Optional[datetime]:
+    def get_next_rest_time_start(self, now: Optional[datetime] = None) -> Optional[datetime]:
         """
         Get the datetime when the next rest time period starts.
         
+        Args:
+            now: Current time, defaults to datetime.now()
+            
         Returns:
             datetime object for next rest time start, or None if no rest time today
         """
-        now = datetime.now()
-        weekday = now.strftime("%A").lower()
-        rest_times = self.get_rest_times(weekday)
-        
-        # Check if in holiday season (extended rest times)
-        holiday_rest = self._get_holiday_rest_times()
-        if holiday_rest:
-            rest_times = holiday_rest
+        if now is None:
+            now = datetime.now()
+        today = now.date()
+        weekday = WEEKDAYS[now.weekday()]
+        rest_times = self._get_parsed_rest_times(weekday, today)
         
-        morning_start = self._parse_time(rest_times["morning"]["start"])
-        evening_start = self._parse_time(rest_times["evening"]["start"])
+        morning_start = rest_times["morning"][0]
+        evening_start = rest_times["evening"][0]
         
         # Create datetime objects for today
-        today = now.date()
         morning_dt = datetime.combine(today, morning_start)
         evening_dt = datetime.combine(today, evening_start)
         
@@ -320,21 +503,24 @@ class ConfigManager:
         else:
             return evening_dt
     
-    def is_rest_time_approaching(self, minutes_before: int = 15) -> Tuple[bool, Optional[datetime]]:
+    def is_rest_time_approaching(self, minutes_before: int = 15,
+                                 now: Optional[datetime] = None) -> Tuple[bool, Optional[datetime]]:
         """
         Check if rest time is approaching within the specified minutes.
         
         Args:
             minutes_before: Number of minutes before rest time to trigger warning
+            now: Current time, defaults to datetime.now()
             
         Returns:
             Tuple of (is_approaching: bool, rest_time_start: Optional[datetime])
         """
-        next_rest_start = self.get_next_rest_time_start()
+        if now is None:
+            now = datetime.now()
+        next_rest_start = self.get_next_rest_time_start(now)
         if next_rest_start is None:
             return (False, None)
         
-        now = datetime.now()
         time_until_rest = (next_rest_start - now).total_seconds() / 60  # minutes
         
         # Check if we're within the warning window
@@ -343,48 +529,23 @@ class ConfigManager:
         
         return (False, next_rest_start)
     
-    def calculate_rest_time_duration(self, rest_times: Optional[Dict] = None) -> int:
+    def calculate_rest_time_duration(self, rest_times: Optional[Dict] = None,
+                                     now: Optional[datetime] = None) -> int:
         """
         Calculate total rest time duration in seconds for a given rest_times dict.
         
         Args:
             rest_times: Rest times dict with morning/evening start/end. If None, uses current weekday.
+            now: Current time, defaults to datetime.now()
             
         Returns:
             Total rest time duration in seconds
         """
-        if rest_times is None:
-            weekday = datetime.now().strftime("%A").lower()
-            rest_times = self.get_rest_times(weekday)
-            # Check if in holiday season
-            holiday_rest = self._get_holiday_rest_times()
-            if holiday_rest:
-                rest_times = holiday_rest
-        
-        def time_duration_seconds(start_str: str, end_str: str) -> int:
-            """Calculate duration between two time strings in seconds."""
-            start_time = self._parse_time(start_str)
-            end_time = self._parse_time(end_str)
-            
-            # Convert to datetime for today to calculate difference
-            today = datetime.now().date()
-            start_dt = datetime.combine(today, start_time)
-            end_dt = datetime.combine(today, end_time)
-            
-            # Handle case where end is before start (spans midnight)
-            if end_dt < start_dt:
-                end_dt += timedelta(days=1)
-            
-            return int((end_dt - start_dt).total_seconds())
-        
-        morning_duration = time_duration_seconds(
-            rest_times["morning"]["start"],
-            rest_times["morning"]["end"]
-        )
-        evening_duration = time_duration_seconds(
-            rest_times["evening"]["start"],
-            rest_times["evening"]["end"]
-        )
-        
-        return morning_duration + evening_duration
-
+        if rest_times is not None:
+            return self._parse_rest_times(rest_times)["duration"]
+        
+        if now is None:
+            now = datetime.now()
+        weekday = WEEKDAYS[now.weekday()]
+        # Includes the holiday season's rest times
+        return self._get_parsed_rest_times(weekday, now.date())["duration"]
@@ -16,10 +16,13 @@ GNU General Public License for more details.
 You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import os
 import sys
+import json
 import argparse
 import logging
 from pathlib import Path
+from typing import Optional
 
 # Ensure project root is on sys.path for direct execution
 BASE_DIR = Path(__file__).resolve().parent
@@ -34,6 +37,29 @@ from daemon import check_daemon_running
 logger = logging.getLogger(__name__)
 
 
+def _minimal_data_dir(config_path: Optional[str] = None) -> Path:
+    """
+    Get the data directory from the config file without a full config load.
+    
+    Commands that only talk to the daemon need nothing but the socket path,
+    so this skips the validation and pattern compilation of ConfigManager.
+    
+    Args:
+        config_path: Path to configuration file. If None, uses default location.
+        
+    Returns:
+        Data directory path, the default if the file is missing or malformed
+    """
+    if config_path is None:
+        config_path = os.path.expanduser("~/.screentime/config.json")
+    try:
+        with open(config_path, 'r') as f:
+            data_dir = json.load(f).get("data_directory", "~/.screentime")
+    except (OSError, ValueError, AttributeError):
+        data_dir = "~/.screentime"
+    return Path(os.path.expanduser(data_dir))
+
+
 def show_stats(config_path: str = None):
     """Display current statistics."""
     config_manager = ConfigManager(config_path)
@@ -88,8 +114,7 @@ def show_logs(config_path: str = None, lines: int = 100, log_buffer=None):
     
     # Always try to get logs from socket first (daemon might be running)
     try:
-        config_manager = ConfigManager(config_path)
-        data_dir = config_manager.get_data_directory()
+        data_dir = _minimal_data_dir(config_path)
         socket_path = get_socket_path(data_dir)
         
         # Check if socket exists
@@ -129,8 +154,7 @@ def show_logs(config_path: str = None, lines: int = 100, log_buffer=None):
 
 def handle_reload_command(config_path: str = None):
     """Handle reload command."""
-    config_manager = ConfigManager(config_path)
-    data_dir = config_manager.get_data_directory()
+    data_dir = _minimal_data_dir(config_path)
     socket_path = get_socket_path(data_dir)
     
     response = send_socket_command(socket_path, "reload")
@@ -143,8 +167,7 @@ def handle_reload_command(config_path: str = None):
 
 def handle_terminate_command(config_path: str = None):
     """Handle terminate command."""
-    config_manager = ConfigManager(config_path)
-    data_dir = config_manager.get_data_directory()
+    data_dir = _minimal_data_dir(config_path)
     socket_path = get_socket_path(data_dir)
     
     response = send_socket_command(socket_path, "terminate")
@@ -158,8 +181,7 @@ def handle_terminate_command(config_path: str = None):
 def handle_modify_rest_time_command(config_path: str = None, morning_end: str = None,
                                     evening_start: str = None):
     """Handle modify rest time command."""
-    config_manager = ConfigManager(config_path)
-    data_dir = config_manager.get_data_directory()
+    data_dir = _minimal_data_dir(config_path)
     socket_path = get_socket_path(data_dir)
     
     # Build command parameters
@@ -184,8 +206,7 @@ def handle_modify_rest_time_command(config_path: str = None, morning_end: str =
 
 def handle_set_temporary_usage_command(config_path: str = None, minutes: int = None):
     """Handle set bonus time command."""
-    config_manager = ConfigManager(config_path)
-    data_dir = config_manager.get_data_directory()
+    data_dir = _minimal_data_dir(config_path)
     socket_path = get_socket_path(data_dir)
     
     if minutes is None:
@@ -157,6 +157,7 @@ class ScreenTimeTracker:
                         self.config_manager.reload_config()
                         # Update tracker with new config
                         self.tracker.config = self.config_manager
+                        self.tracker.invalidate_config_cache()
                         # Update interval
                         interval = self.config_manager.get_tracking_interval()
                         logger.info("Configuration reloaded successfully")
@@ -251,8 +252,9 @@ class ScreenTimeTracker:
                             )
                     
                     # Check warnings
-                    self.rest_time_warning.check_and_notify(stats)
-                    self.limit_warning.check_and_notify(stats)
+                    now = datetime.now()
+                    self.rest_time_warning.check_and_notify(stats, now)
+                    self.limit_warning.check_and_notify(stats, now)
                 else:
                     logger.debug("Could not determine active window")
                 
@@ -264,12 +266,16 @@ class ScreenTimeTracker:
                         self.last_history_save = current_time
                         logger.debug("History saved (periodic)")
                 
-                # Sleep in small chunks to allow quick shutdown
+                # Wait in small chunks to allow quick shutdown, waking up early
+                # when a different window becomes active. Title changes are
+                # picked up by the next regular tick, some windows retitle
+                # far more often than once per interval
                 if self.running:
                     sleep_chunk = min(interval, 0.1)  # Check every 100ms max
                     elapsed = 0
                     while elapsed < interval and self.running:
-                        time.sleep(sleep_chunk)
+                        if self.monitor.wait_for_event(sleep_chunk):
+                            break
                         elapsed += sleep_chunk
                 
         except KeyboardInterrupt:
@@ -17,6 +17,7 @@ You should have received a copy of the GNU General Public License
 along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 from utils.strings import sanitize_string
+from utils.common import WEEKDAYS, json_dumps, json_loads
 from utils.system import drop_privileges, configure_user_environment
 from utils.ipc import (
     SocketServer,
@@ -27,6 +28,9 @@ from utils.ipc import (
 
 __all__ = [
     'sanitize_string',
+    'WEEKDAYS',
+    'json_dumps',
+    'json_loads',
     'drop_privileges',
     'configure_user_environment',
     'SocketServer',
@@ -0,0 +1,62 @@
+"""
+Helpers shared by the tracker and the configuration manager.
+
+Copyright (C) 2025  Sören Heisrath <screentime at projects dot heisrath dot org>
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <https://www.gnu.org/licenses/>.
+"""
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Config keys of the weekdays, indexed by date.weekday(). Unlike strftime("%A")
+# they don't depend on the locale
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def json_dumps(obj, indent: bool = False) -> bytes:
+    """
+    Serialize obj to UTF-8 encoded JSON, using orjson if available.
+    
+    Args:
+        obj: Object to serialize
+        indent: If True, pretty-print with an indent of 2
+        
+    Returns:
+        Encoded JSON
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    if indent:
+        return json.dumps(obj, indent=2).encode('utf-8')
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+
+def json_loads(data: bytes):
+    """
+    Parse UTF-8 encoded JSON, using orjson if available.
+    
+    orjson's decode error subclasses json.JSONDecodeError, so callers only
+    need to catch the latter.
+    """
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -18,6 +18,11 @@ along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 import re
 
+# Characters not allowed in sanitized strings. Compiled once, sanitize_string
+# runs for every window title and application name the monitor reports
+# (see X11Monitor.get_active_window in core/monitor.py)
+_UNSAFE_CHARS_RE = re.compile(r'[^-+:,;._ a-zA-Z0-9]')
+
 
 def sanitize_string(text: str) -> str:
     """
@@ -32,5 +37,5 @@ def sanitize_string(text: str) -> str:
     if not text:
         return ""
     
-    return re.sub(r'[^-+:,;._ a-zA-Z0-9]', '_', text)
+    return _UNSAFE_CHARS_RE.sub('_', text)
 